@@ -0,0 +1,95 @@
+# =============================================================================
+# SISTEMA DE TURNOS - ESCRITURA AGRUPADA (GROUP COMMIT)
+# =============================================================================
+"""
+Agrupa escrituras de requests concurrentes en una sola transacción.
+Cada request encola su pedido y espera el resultado; un hilo escritor junta
+los pedidos que llegan durante `ventana` segundos (hasta `maximo`) y los
+procesa juntos con una única llamada a la función de escritura, de modo que
+una ráfaga de N pedidos cuesta un commit en lugar de N.
+
+El hilo es por proceso: se inicia con el primer pedido y se vuelve a iniciar
+en cada proceso hijo después de un fork (gunicorn con preload_app).
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import contextlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# =============================================================================
+# ESCRITOR AGRUPADO
+# =============================================================================
+class EscritorAgrupado:
+    """Hilo que ejecuta los pedidos encolados en lotes"""
+
+    def __init__(self, escribir, ventana=0.005, maximo=200):
+        self._escribir = escribir  # función(lista de pedidos) -> lista de resultados en el mismo orden
+        self.ventana = ventana
+        self.maximo = maximo
+        self.contexto = contextlib.nullcontext  # contexto en el que corre cada lote (app_context)
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.lotes = 0  # cantidad de lotes escritos (commits)
+
+    def enviar(self, pedido):
+        """
+        Encola un pedido; devuelve un Future con su resultado. Mientras el pedido
+        no entró en un lote, Future.cancel() lo retira y devuelve True.
+        """
+        if self._pid != os.getpid():
+            self._iniciar()
+        futuro = Future()
+        self._cola.put((pedido, futuro))
+        return futuro
+
+    def _iniciar(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Después de un fork el hilo del padre no existe: pedidos heredados se descartan
+            self._cola = queue.Queue()
+            threading.Thread(target=self._ejecutar, name='escritor-agrupado', daemon=True).start()
+            self._pid = os.getpid()
+
+    # =========================================================================
+    # HILO ESCRITOR
+    # =========================================================================
+    def _ejecutar(self):
+        cola = self._cola
+        while True:
+            lote = [cola.get()]
+            limite = time.monotonic() + self.ventana
+            while len(lote) < self.maximo:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._escribir_lote(lote)
+
+    def _escribir_lote(self, lote):
+        # Los pedidos cancelados (el request dejó de esperar) no se escriben
+        lote = [(pedido, futuro) for pedido, futuro in lote if futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+        futuros = [futuro for _, futuro in lote]
+        try:
+            with self.contexto():
+                resultados = self._escribir([pedido for pedido, _ in lote])
+        except Exception as e:
+            # El lote es una sola transacción: si falla, fallan todos sus pedidos
+            for futuro in futuros:
+                futuro.set_exception(e)
+            return
+        self.lotes += 1
+        for futuro, resultado in zip(futuros, resultados):
+            futuro.set_result(resultado)
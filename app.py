@@ -9,37 +9,72 @@
 # =============================================================================
 # IMPORTS
 # =============================================================================
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, abort, current_app, request, jsonify
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt, get_jwt_identity
 from datetime import datetime, timedelta
+from concurrent.futures import TimeoutError as FuturoVencido
+from functools import wraps
+import base64
+import click
+import hashlib
+import math
 import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session, object_session
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
+from eventos import BusEventos, flujo_sse
+from agrupador import EscritorAgrupado
+from colas import MotorColas
+from estimador import EstimadorEspera
+from limites import LimitadorTasa, crear_backend
+from migraciones import aplicar_migraciones
+from cache import CacheLRU, CacheTTL
+from catalogo import CatalogoCategorias
+from pantalla import PantallaSala
+from metricas import Metricas
+from config import config
 
 # =============================================================================
-# CONFIGURACION DE LA APLICACION
+# EXTENSIONES Y ESTADO DEL PROCESO
 # =============================================================================
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'tu_clave_secreta_aqui')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///turnero.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Se vinculan a la aplicación en create_app(); crearlas no abre conexiones
+db = SQLAlchemy()
+jwt = JWTManager()
+cors = CORS()
+api = Blueprint('api', __name__)
 
-# Configurar CORS para API
-CORS(app, resources={
-    r"/api/*": {
-        "origins": ["http://localhost:3000", "http://localhost:5173", "*"],  # Permitir todos en desarrollo
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
-    }
-})
+# Bus de eventos para notificar cambios de turnos a los clientes suscritos:
+# uno con todos los eventos y uno por sucursal para las pantallas de cada sala
+bus_eventos = BusEventos()
+buses_sucursal = {}  # sucursal_id -> BusEventos
+_buses_lock = threading.Lock()
+
+# Usuarios recientes (dicts) y momento desde el cual se revocan sus tokens
+cache_usuarios = CacheLRU(capacidad=1024)
+# Solo en memoria del proceso: ver "Revocación de tokens" en el README
+tokens_revocados = {}  # usuario_id -> timestamp
+
+# Instrumentación por endpoint, expuesta en /api/metricas
+metricas = Metricas()
+
+# Estado en memoria de las colas de espera (se carga con el primer request)
+motor_colas = MotorColas()
 
-# Configurar JWT
-app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'cambiar-en-produccion')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+# Tiempos de atención y operadores activos para estimar la espera
+estimador_espera = EstimadorEspera()
 
-db = SQLAlchemy(app)
-jwt = JWTManager(app)
+# Cubetas de fichas de los endpoints públicos (backend según RATE_LIMIT_BACKEND)
+limitador_tasa = LimitadorTasa()
+
+# Estadísticas del día (se invalidan con cada cambio de estado de un turno)
+cache_estadisticas = CacheTTL(ttl=10)
 
 # =============================================================================
 # MODELOS DE BASE DE DATOS
@@ -53,6 +88,15 @@ class Usuario(db.Model):
     es_admin = db.Column(db.Boolean, default=False)
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
 
+# Sucursal creada por la migración 2; la usan las bases de una sola oficina
+SUCURSAL_POR_DEFECTO = 1
+
+class Sucursal(db.Model):
+    """Oficina con sus propias categorías, colas y numeración"""
+    id = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(100), nullable=False)
+    activa = db.Column(db.Boolean, default=True)
+
 class Categoria(db.Model):
     """Modelo para gestionar categorías de atención"""
     id = db.Column(db.Integer, primary_key=True)
@@ -60,6 +104,11 @@ class Categoria(db.Model):
     descripcion = db.Column(db.Text)
     tiempo_estimado = db.Column(db.Integer, default=15)  # en minutos
     activa = db.Column(db.Boolean, default=True)
+    sucursal_id = db.Column(db.Integer, db.ForeignKey('sucursal.id'), nullable=False, default=SUCURSAL_POR_DEFECTO)
+    
+    __table_args__ = (
+        db.Index('ix_categoria_sucursal', 'sucursal_id'),
+    )
 
 class Turno(db.Model):
     """Modelo para gestionar turnos del sistema"""
@@ -67,155 +116,1045 @@ class Turno(db.Model):
     numero = db.Column(db.Integer, nullable=False)
     categoria_id = db.Column(db.Integer, db.ForeignKey('categoria.id'), nullable=False)
     estado = db.Column(db.String(20), default='esperando')  # esperando, en_atencion, completado, cancelado
-    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_creacion = db.Column(db.DateTime, default=datetime.now)
     hora_estimada = db.Column(db.DateTime)
     hora_inicio = db.Column(db.DateTime)
     hora_fin = db.Column(db.DateTime)
+    # Copia de la sucursal de la categoría, para filtrar por sucursal sin join
+    sucursal_id = db.Column(db.Integer, db.ForeignKey('sucursal.id'), nullable=False, default=SUCURSAL_POR_DEFECTO)
     
     categoria = db.relationship('Categoria', backref='turnos')
+    
+    # Índices de las consultas frecuentes (ver migraciones.py para bases existentes)
+    __table_args__ = (
+        db.Index('ix_turno_categoria_estado', 'categoria_id', 'estado'),
+        db.Index('ix_turno_categoria_numero', 'categoria_id', 'numero'),
+        db.Index('ix_turno_estado_fecha', 'estado', 'fecha_creacion'),
+        db.Index('ix_turno_fecha_creacion', 'fecha_creacion'),
+        db.Index('ix_turno_sucursal_estado_fecha', 'sucursal_id', 'estado', 'fecha_creacion'),
+        db.Index('ix_turno_sucursal_fecha', 'sucursal_id', 'fecha_creacion'),
+    )
+
+class TurnoHistorico(db.Model):
+    """Turnos cerrados de días anteriores, movidos desde Turno por archivar_turnos()"""
+    __tablename__ = 'turno_historico'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # mismo id que tenía en Turno
+    numero = db.Column(db.Integer, nullable=False)
+    categoria_id = db.Column(db.Integer, db.ForeignKey('categoria.id'), nullable=False)
+    estado = db.Column(db.String(20), nullable=False)
+    fecha_creacion = db.Column(db.DateTime, nullable=False)
+    hora_estimada = db.Column(db.DateTime)
+    hora_inicio = db.Column(db.DateTime)
+    hora_fin = db.Column(db.DateTime)
+    sucursal_id = db.Column(db.Integer, db.ForeignKey('sucursal.id'), nullable=False, default=SUCURSAL_POR_DEFECTO)
+    
+    __table_args__ = (
+        db.Index('ix_turno_historico_fecha_creacion', 'fecha_creacion'),
+        db.Index('ix_turno_historico_categoria_fecha', 'categoria_id', 'fecha_creacion'),
+        db.Index('ix_turno_historico_sucursal_fecha', 'sucursal_id', 'fecha_creacion'),
+    )
+
+class SecuenciaTurno(db.Model):
+    """Contador de numeración de turnos por categoría y día"""
+    __tablename__ = 'secuencia_turno'
+    categoria_id = db.Column(db.Integer, db.ForeignKey('categoria.id'), primary_key=True)
+    fecha = db.Column(db.Date, primary_key=True)
+    ultimo_numero = db.Column(db.Integer, nullable=False, default=0)
+
+class ResumenDiario(db.Model):
+    """Conteos y tiempos acumulados por día, categoría y hora de emisión (ver consolidar_dia)"""
+    __tablename__ = 'resumen_diario'
+    fecha = db.Column(db.Date, primary_key=True)
+    categoria_id = db.Column(db.Integer, db.ForeignKey('categoria.id'), primary_key=True)
+    hora = db.Column(db.Integer, primary_key=True)  # 0-23, hora de fecha_creacion
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completados = db.Column(db.Integer, nullable=False, default=0)
+    cancelados = db.Column(db.Integer, nullable=False, default=0)
+    # Sumas y cantidades (no promedios) para poder agregar cualquier rango
+    espera_segundos = db.Column(db.Float, nullable=False, default=0)
+    espera_cantidad = db.Column(db.Integer, nullable=False, default=0)
+    atencion_segundos = db.Column(db.Float, nullable=False, default=0)
+    atencion_cantidad = db.Column(db.Integer, nullable=False, default=0)
+
+# =============================================================================
+# CATALOGO DE CATEGORIAS
+# =============================================================================
+def _cargar_categorias():
+    return [{
+        'id': c.id,
+        'nombre': c.nombre,
+        'descripcion': c.descripcion,
+        'tiempo_estimado': c.tiempo_estimado,
+        'activa': c.activa,
+        'sucursal_id': c.sucursal_id
+    } for c in Categoria.query.order_by(Categoria.id).all()]
+
+catalogo_categorias = CatalogoCategorias(_cargar_categorias)
+
+# JSON de las pantallas de sala, mantenido con cada cambio de estado de un turno
+pantalla_sala = PantallaSala(motor_colas, catalogo_categorias)
+
+@event.listens_for(Categoria, 'after_insert')
+@event.listens_for(Categoria, 'after_update')
+@event.listens_for(Categoria, 'after_delete')
+def _marcar_categorias_modificadas(mapper, connection, categoria):
+    object_session(categoria).info['categorias_modificadas'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_catalogo(session):
+    # Recién después del commit los demás pueden leer los cambios
+    if session.info.pop('categorias_modificadas', False):
+        catalogo_categorias.invalidar()
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_marca_categorias(session):
+    session.info.pop('categorias_modificadas', None)
+
+# =============================================================================
+# AUTENTICACION Y AUTORIZACION
+# =============================================================================
+def crear_token(usuario):
+    """Token de acceso con el rol embebido para autorizar sin leer la base"""
+    # 'emitido' con fracciones de segundo: iat no distingue un login del mismo segundo que un logout
+    return create_access_token(identity=str(usuario.id), additional_claims={
+        'es_admin': usuario.es_admin,
+        'emitido': time.time()
+    })
+
+def obtener_usuario(usuario_id):
+    """Datos públicos de un usuario desde el cache LRU (None si no existe)"""
+    def cargar():
+        usuario = db.session.get(Usuario, usuario_id)
+        if not usuario:
+            return None
+        return {
+            'id': usuario.id,
+            'nombre': usuario.nombre,
+            'email': usuario.email,
+            'es_admin': usuario.es_admin
+        }
+    return cache_usuarios.obtener(usuario_id, cargar)
+
+def revocar_tokens(usuario_id):
+    """Invalida los tokens emitidos hasta ahora para el usuario"""
+    tokens_revocados[usuario_id] = time.time()
+    cache_usuarios.descartar(usuario_id)
+
+@jwt.token_in_blocklist_loader
+def token_revocado(jwt_header, jwt_payload):
+    revocado = tokens_revocados.get(int(jwt_payload['sub']))
+    if revocado is None:
+        return False
+    # Tokens anteriores sin 'emitido': iat tiene resolución de segundos y, ante la duda, se revocan
+    return jwt_payload.get('emitido', jwt_payload['iat']) <= revocado
+
+def usuario_actual_id():
+    return int(get_jwt_identity())
+
+def admin_requerido(fn):
+    """Requiere un token válido de administrador (chequeo del claim, sin consultar la base)"""
+    @wraps(fn)
+    @jwt_required()
+    def envoltura(*args, **kwargs):
+        es_admin = get_jwt().get('es_admin')
+        if es_admin is None:
+            # Token emitido antes de embeber el rol
+            usuario = obtener_usuario(usuario_actual_id())
+            es_admin = usuario and usuario['es_admin']
+        if not es_admin:
+            return jsonify({'error': 'Acceso denegado'}), 403
+        return fn(*args, **kwargs)
+    return envoltura
+
+@event.listens_for(Usuario, 'after_update')
+@event.listens_for(Usuario, 'after_delete')
+def _marcar_usuario_modificado(mapper, connection, usuario):
+    object_session(usuario).info.setdefault('usuarios_modificados', set()).add(usuario.id)
+
+@event.listens_for(Session, 'after_commit')
+def _revocar_usuarios_modificados(session):
+    # Un cambio de rol, contraseña o una baja invalida los tokens con el rol viejo
+    for usuario_id in session.info.pop('usuarios_modificados', ()):
+        revocar_tokens(usuario_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_usuarios_modificados(session):
+    session.info.pop('usuarios_modificados', None)
+
+# =============================================================================
+# LIMITES DE TASA
+# =============================================================================
+def claves_limite_turnos():
+    """Cubeta del kiosco si envía una clave conocida; si no, la de su IP"""
+    kiosco = request.headers.get('X-Kiosco-Key')
+    if kiosco and kiosco in current_app.config['KIOSCO_CLAVES']:
+        return [(f'turnos:kiosco:{kiosco}', current_app.config['LIMITE_TURNOS_KIOSCO'])]
+    return [(f'turnos:ip:{request.remote_addr}', current_app.config['LIMITE_TURNOS_IP'])]
+
+def claves_limite_login():
+    """Cubetas de la IP y del email: frena tanto a un cliente como a un ataque distribuido a una cuenta"""
+    claves = [(f'login:ip:{request.remote_addr}', current_app.config['LIMITE_LOGIN_IP'])]
+    email = (request.get_json(silent=True) or {}).get('email')
+    if isinstance(email, str) and email.strip():
+        claves.append((f'login:email:{email.strip().lower()}', current_app.config['LIMITE_LOGIN_EMAIL']))
+    return claves
+
+def limitar_tasa(claves):
+    """Responde 429 sin ejecutar la vista si se agotó alguna de las cubetas que devuelve claves()"""
+    def decorador(fn):
+        @wraps(fn)
+        def envoltura(*args, **kwargs):
+            if current_app.config['RATE_LIMIT_HABILITADO']:
+                for clave, (capacidad, por_minuto) in claves():
+                    if not capacidad or not por_minuto:
+                        continue  # cubeta desactivada
+                    permitido, reintentar = limitador_tasa.permitir(clave, capacidad, por_minuto)
+                    if not permitido:
+                        respuesta = jsonify({'error': 'Demasiadas solicitudes, intente más tarde'})
+                        respuesta.status_code = 429
+                        respuesta.headers['Retry-After'] = str(max(1, math.ceil(reintentar)))
+                        return respuesta
+            return fn(*args, **kwargs)
+        return envoltura
+    return decorador
 
 # =============================================================================
 # INICIALIZACION DE LA BASE DE DATOS
 # =============================================================================
-with app.app_context():
+# Categorías que se crean en una base vacía
+CATEGORIAS_POR_DEFECTO = [
+    {'nombre': 'Atencion General', 'descripcion': 'Consultas generales', 'tiempo_estimado': 15},
+    {'nombre': 'Pagos', 'descripcion': 'Realizar pagos', 'tiempo_estimado': 10},
+    {'nombre': 'Reclamos', 'descripcion': 'Presentar reclamos', 'tiempo_estimado': 20},
+    {'nombre': 'Informes', 'descripcion': 'Solicitar informes', 'tiempo_estimado': 25}
+]
+
+def inicializar_esquema():
+    """Crea las tablas faltantes y aplica las migraciones pendientes"""
     db.create_all()
+    aplicar_migraciones(db.engine)
+
+def sembrar_categorias(sucursal_id=SUCURSAL_POR_DEFECTO):
+    """Crea las categorías por defecto si la sucursal no tiene ninguna; devuelve cuántas creó"""
+    if Categoria.query.filter_by(sucursal_id=sucursal_id).first():
+        return 0
+    db.session.add_all([Categoria(sucursal_id=sucursal_id, **datos) for datos in CATEGORIAS_POR_DEFECTO])
+    db.session.commit()
+    return len(CATEGORIAS_POR_DEFECTO)
+
+def crear_admin_por_defecto():
+    """Crea admin@turnero.com si no hay administradores; devuelve True si lo creó"""
+    if Usuario.query.filter_by(es_admin=True).first():
+        return False
+    db.session.add(Usuario(
+        nombre='Administrador',
+        email='admin@turnero.com',
+        password_hash=generate_password_hash('admin123'),
+        es_admin=True
+    ))
+    db.session.commit()
+    return True
+
+def inicializar_base():
+    """Esquema, migraciones y datos mínimos para que la API funcione"""
+    inicializar_esquema()
+    sembrar_categorias()
+
+def cargar_estado():
+    """Carga las colas activas y los tiempos de atención del día en memoria"""
+    motor_colas.reconstruir(
+        db.session.query(Turno.id, Turno.categoria_id, Turno.numero, Turno.estado, Turno.fecha_creacion)
+        .filter(Turno.estado.in_(['esperando', 'en_atencion']))
+        .order_by(Turno.id)
+    )
+    pantalla_sala.invalidar()
+    atenciones = db.session.query(Turno.categoria_id, Turno.hora_inicio, Turno.hora_fin).filter(
+        Turno.fecha_creacion >= rango_dia(datetime.now().date())[0],
+        Turno.estado == 'completado',
+        Turno.hora_inicio.isnot(None),
+        Turno.hora_fin.isnot(None)
+    ).order_by(Turno.hora_fin)
+    for categoria_id, hora_inicio, hora_fin in atenciones:
+        estimador_espera.registrar_atencion(categoria_id, (hora_fin - hora_inicio).total_seconds())
+
+# Endpoints que no necesitan la base y no deben disparar la inicialización
+_ENDPOINTS_SIN_BASE = {'api.health_check', 'api.api_metricas'}
+_inicializacion_lock = threading.Lock()
+
+def _inicializar_proceso():
+    """Prepara la base (si AUTO_INICIALIZAR_DB) y el estado en memoria una vez por proceso"""
+    extensiones = current_app.extensions
+    if extensiones.get('turnero_inicializado') or request.endpoint in _ENDPOINTS_SIN_BASE:
+        return
+    with _inicializacion_lock:
+        if extensiones.get('turnero_inicializado'):
+            return
+        if current_app.config['AUTO_INICIALIZAR_DB']:
+            inicializar_base()
+        cargar_estado()
+        extensiones['turnero_inicializado'] = True
+
+@click.command('init-db')
+@with_appcontext
+def comando_init_db():
+    """Crea las tablas y aplica las migraciones pendientes"""
+    inicializar_esquema()
+    click.echo('Base de datos inicializada')
+
+@click.command('crear-sucursal')
+@click.argument('nombre')
+@click.option('--sin-categorias', is_flag=True, help='No crear las categorías por defecto')
+@with_appcontext
+def comando_crear_sucursal(nombre, sin_categorias):
+    """Crea una sucursal con (salvo --sin-categorias) las categorías por defecto"""
+    sucursal = Sucursal(nombre=nombre)
+    db.session.add(sucursal)
+    db.session.commit()
+    creadas = 0 if sin_categorias else sembrar_categorias(sucursal.id)
+    click.echo(f'Sucursal {sucursal.id} creada con {creadas} categorías')
+
+@click.command('seed')
+@click.option('--admin', is_flag=True, help='Crear también admin@turnero.com / admin123')
+@with_appcontext
+def comando_seed(admin):
+    """Carga las categorías por defecto (y opcionalmente el administrador)"""
+    click.echo(f'Categorías creadas: {sembrar_categorias()}')
+    if admin and crear_admin_por_defecto():
+        click.echo('Usuario administrador creado: admin@turnero.com / admin123')
+
+# =============================================================================
+# UTILIDADES
+# =============================================================================
+def lista_de_ids(valor):
+    """
+    Devuelve `valor` si es una lista de enteros; si no, lanza ValueError. Un
+    string o un dict también se pueden recorrer ("12" serían los ids 1 y 2).
+    """
+    if not isinstance(valor, list) or not all(type(v) is int for v in valor):
+        raise ValueError('se esperaba una lista de enteros')
+    return valor
+
+def rango_dia(fecha):
+    """Inicio y fin [inicio, fin) de un día, para filtrar por fecha usando índices"""
+    inicio = datetime.combine(fecha, datetime.min.time())
+    return inicio, inicio + timedelta(days=1)
+
+def segundos_entre(desde, hasta):
+    """Expresión SQL con los segundos transcurridos entre dos columnas DateTime"""
+    dialecto = db.engine.dialect.name
+    if dialecto == 'postgresql':
+        return db.func.extract('epoch', hasta - desde)
+    if dialecto == 'mysql':
+        return db.func.timestampdiff(db.text('SECOND'), desde, hasta)
+    return (db.func.julianday(hasta) - db.func.julianday(desde)) * 86400
+
+def hora_del_dia(columna):
+    """Expresión SQL con la hora (0-23) de una columna DateTime"""
+    dialecto = db.engine.dialect.name
+    if dialecto == 'postgresql':
+        return db.cast(db.func.extract('hour', columna), db.Integer)
+    if dialecto == 'mysql':
+        return db.func.hour(columna)
+    return db.cast(db.func.strftime('%H', columna), db.Integer)
+
+# =============================================================================
+# NUMERACION DE TURNOS
+# =============================================================================
+# Bloques de números reservados por este proceso: (categoria_id, fecha) -> [siguiente, ultimo]
+_bloques_numeros = {}
+_bloques_lock = threading.Lock()
+
+def _incrementar_secuencia(conexion, categoria_id, fecha, cantidad):
+    """
+    Suma `cantidad` al contador del día en un único UPDATE atómico y devuelve
+    el nuevo último número, o None si todavía no existe el contador del día.
+    """
+    tabla = SecuenciaTurno.__table__
+    update = tabla.update().where(
+        tabla.c.categoria_id == categoria_id,
+        tabla.c.fecha == fecha
+    ).values(ultimo_numero=tabla.c.ultimo_numero + cantidad)
+    
+    if conexion.dialect.update_returning:
+        return conexion.execute(update.returning(tabla.c.ultimo_numero)).scalar()
+    
+    # Sin RETURNING: el UPDATE ya bloqueó la fila, la lectura posterior es consistente
+    if conexion.execute(update).rowcount == 0:
+        return None
+    return conexion.execute(
+        db.select(tabla.c.ultimo_numero).where(
+            tabla.c.categoria_id == categoria_id,
+            tabla.c.fecha == fecha
+        )
+    ).scalar()
+
+def _crear_secuencia(conexion, categoria_id, fecha, cantidad):
+    """Crea el contador del día; devuelve None si otro proceso lo creó antes"""
+    tabla = SecuenciaTurno.__table__
+    inicial = 0
+    
+    # Primera vez que se numera la categoría: continuar la numeración existente
+    if conexion.execute(
+        db.select(tabla.c.fecha).where(tabla.c.categoria_id == categoria_id).limit(1)
+    ).first() is None:
+        inicial = conexion.execute(
+            db.select(db.func.coalesce(db.func.max(Turno.numero), 0)).where(
+                Turno.categoria_id == categoria_id
+            )
+        ).scalar()
+    
+    try:
+        with conexion.begin_nested():
+            conexion.execute(tabla.insert().values(
+                categoria_id=categoria_id,
+                fecha=fecha,
+                ultimo_numero=inicial + cantidad
+            ))
+    except IntegrityError:
+        return None
+    return inicial + cantidad
+
+def _reservar_numeros(conexion, categoria_id, fecha, cantidad):
+    """Reserva `cantidad` números consecutivos y devuelve el último"""
+    while True:
+        ultimo = _incrementar_secuencia(conexion, categoria_id, fecha, cantidad)
+        if ultimo is None:
+            ultimo = _crear_secuencia(conexion, categoria_id, fecha, cantidad)
+        if ultimo is not None:
+            return ultimo
+
+def asignar_numero(categoria_id):
+    """Obtiene el próximo número de turno del día para la categoría"""
+    fecha = datetime.now().date()
+    bloque = current_app.config['TURNOS_BLOQUE_NUMEROS']
+    
+    if bloque <= 1:
+        # Dentro de la transacción del turno: si el insert falla no quedan huecos
+        return _reservar_numeros(db.session.connection(), categoria_id, fecha, 1)
+    
+    with _bloques_lock:
+        clave = (categoria_id, fecha)
+        rango = _bloques_numeros.get(clave)
+        if not rango or rango[0] > rango[1]:
+            # Reserva en una transacción propia y corta para no retener el bloqueo
+            with db.engine.begin() as conexion:
+                ultimo = _reservar_numeros(conexion, categoria_id, fecha, bloque)
+            rango = _bloques_numeros[clave] = [ultimo - bloque + 1, ultimo]
+            # Descartar bloques de días anteriores
+            for vieja in [k for k in _bloques_numeros if k[1] != fecha]:
+                del _bloques_numeros[vieja]
+        numero = rango[0]
+        rango[0] += 1
+        return numero
+
+# =============================================================================
+# ARCHIVO DE TURNOS
+# =============================================================================
+ESTADOS_CERRADOS = ('completado', 'cancelado')
+
+def archivar_turnos(antes_de, lote=1000):
+    """
+    Mueve a turno_historico los turnos cerrados creados antes de `antes_de`,
+    en transacciones de hasta `lote` turnos. Devuelve cuántos movió.
+    """
+    vivos, historico = Turno.__table__, TurnoHistorico.__table__
+    columnas = [columna.name for columna in historico.columns]
+    
+    # El turno de mayor id nunca se archiva: SQLite reutilizaría los ids a partir del máximo
+    with db.engine.connect() as conexion:
+        ultimo_id = conexion.execute(db.select(db.func.max(vivos.c.id))).scalar()
+    if ultimo_id is None:
+        return 0
+    archivables = db.and_(
+        vivos.c.fecha_creacion < antes_de,
+        vivos.c.estado.in_(ESTADOS_CERRADOS),
+        vivos.c.id < ultimo_id
+    )
+    
+    movidos = 0
+    while True:
+        with db.engine.begin() as conexion:
+            ids = conexion.execute(
+                db.select(vivos.c.id).where(archivables).order_by(vivos.c.id).limit(lote)
+            ).scalars().all()
+            if not ids:
+                break
+            tramo = db.and_(archivables, vivos.c.id.between(ids[0], ids[-1]))
+            conexion.execute(historico.insert().from_select(
+                columnas, db.select(*[vivos.c[nombre] for nombre in columnas]).where(tramo)
+            ))
+            conexion.execute(vivos.delete().where(tramo))
+        movidos += len(ids)
+        if len(ids) < lote:
+            break
+    return movidos
+
+@click.command('archivar')
+@click.option('--dias', type=int, help='Días cerrados que se conservan (por defecto ARCHIVO_DIAS_EN_VIVO)')
+@click.option('--lote', type=int, help='Turnos por transacción (por defecto ARCHIVO_LOTE)')
+@with_appcontext
+def comando_archivar(dias, lote):
+    """Mueve los turnos cerrados de días anteriores a turno_historico"""
+    dias = current_app.config['ARCHIVO_DIAS_EN_VIVO'] if dias is None else dias
+    antes_de = rango_dia(datetime.now().date() - timedelta(days=dias))[0]
+    movidos = archivar_turnos(antes_de, lote or current_app.config['ARCHIVO_LOTE'])
+    click.echo(f'Turnos archivados: {movidos} (creados antes de {antes_de:%Y-%m-%d})')
+
+# =============================================================================
+# RESUMENES DIARIOS
+# =============================================================================
+def consolidar_dia(fecha):
+    """
+    Recalcula las filas de resumen_diario de un día a partir de los turnos vivos
+    y archivados. Es idempotente; devuelve la cantidad de filas generadas.
+    """
+    inicio, fin = rango_dia(fecha)
+    origen = db.union_all(*[
+        db.select(*columnas_turno(modelo)).where(modelo.fecha_creacion >= inicio, modelo.fecha_creacion < fin)
+        for modelo in (Turno, TurnoHistorico)
+    ]).subquery()
+    espera = segundos_entre(origen.c.fecha_creacion, origen.c.hora_inicio)
+    atencion = segundos_entre(origen.c.hora_inicio, origen.c.hora_fin)
+    hora = hora_del_dia(origen.c.fecha_creacion)
+    
+    def contar(estado):
+        return db.func.sum(db.case((origen.c.estado == estado, 1), else_=0))
+    
+    seleccion = db.select(
+        db.literal(fecha, db.Date),
+        origen.c.categoria_id,
+        hora,
+        db.func.count(),
+        contar('completado'),
+        contar('cancelado'),
+        db.func.coalesce(db.func.sum(espera), 0),
+        db.func.count(origen.c.hora_inicio),
+        db.func.coalesce(db.func.sum(atencion), 0),
+        db.func.count(atencion)
+    ).group_by(origen.c.categoria_id, hora)
+    
+    tabla = ResumenDiario.__table__
+    with db.engine.begin() as conexion:
+        conexion.execute(tabla.delete().where(tabla.c.fecha == fecha))
+        return conexion.execute(tabla.insert().from_select([
+            'fecha', 'categoria_id', 'hora', 'total', 'completados', 'cancelados',
+            'espera_segundos', 'espera_cantidad', 'atencion_segundos', 'atencion_cantidad'
+        ], seleccion)).rowcount
+
+def dias_sin_consolidar(hasta):
+    """
+    Días con turnos hasta `hasta` inclusive cuyo resumen falta o ya no coincide
+    con sus turnos: cantidad, completados o cancelados cambiaron después de
+    consolidarlo (turnos agregados, o cerrados tarde). Se comparan todos los días
+    para que un `--fecha` reciente no deje huecos sin consolidar.
+    """
+    fin = rango_dia(hasta)[1]
+    conteos = {}
+    for modelo in (Turno, TurnoHistorico):
+        dia = db.func.date(modelo.fecha_creacion, type_=db.Date)
+        filas = db.session.execute(db.select(
+            dia,
+            db.func.count(),
+            db.func.sum(db.case((modelo.estado == 'completado', 1), else_=0)),
+            db.func.sum(db.case((modelo.estado == 'cancelado', 1), else_=0))
+        ).where(modelo.fecha_creacion < fin).group_by(dia))
+        for fecha, *conteo in filas:
+            anterior = conteos.get(fecha, (0, 0, 0))
+            conteos[fecha] = tuple(a + b for a, b in zip(anterior, conteo))
+    resumidos = {
+        fecha: tuple(conteo) for fecha, *conteo in db.session.execute(db.select(
+            ResumenDiario.fecha,
+            db.func.sum(ResumenDiario.total),
+            db.func.sum(ResumenDiario.completados),
+            db.func.sum(ResumenDiario.cancelados)
+        ).group_by(ResumenDiario.fecha))
+    }
+    return sorted(fecha for fecha, conteo in conteos.items() if resumidos.get(fecha) != conteo)
+
+@click.command('consolidar')
+@click.option('--fecha', type=click.DateTime(formats=['%Y-%m-%d']), help='Recalcular solo este día')
+@with_appcontext
+def comando_consolidar(fecha):
+    """Genera los resúmenes diarios de los días cerrados pendientes o desactualizados"""
+    ayer = datetime.now().date() - timedelta(days=1)
+    if fecha and fecha.date() > ayer:
+        # Un resumen de hoy quedaría desactualizado con el próximo turno
+        raise click.BadParameter('solo se consolidan días cerrados (anteriores a hoy)', param_hint='--fecha')
+    dias = [fecha.date()] if fecha else dias_sin_consolidar(ayer)
+    filas = sum(consolidar_dia(dia) for dia in dias)
+    click.echo(f'Días consolidados: {len(dias)} ({filas} filas)')
+
+# =============================================================================
+# SERIALIZACION
+# =============================================================================
+# Columnas necesarias para serializar un turno sin materializar objetos ORM
+def columnas_turno(modelo):
+    return (
+        modelo.id, modelo.numero, modelo.categoria_id, modelo.estado, modelo.fecha_creacion,
+        modelo.hora_estimada, modelo.hora_inicio, modelo.hora_fin, modelo.sucursal_id
+    )
+
+COLUMNAS_TURNO = columnas_turno(Turno)
+
+def nombre_categoria(categoria_id):
+    nombres = catalogo_categorias.nombres()
+    if categoria_id not in nombres:
+        # Categoría creada por otro proceso después de cargar el catálogo
+        catalogo_categorias.invalidar(compartir=False)
+        nombres = catalogo_categorias.nombres()
+    return nombres.get(categoria_id)
+
+def serializar_turno(turno, nombres=None):
+    """Convierte un Turno (objeto ORM o fila con COLUMNAS_TURNO) en dict para JSON"""
+    hora_estimada, hora_inicio, hora_fin = turno.hora_estimada, turno.hora_inicio, turno.hora_fin
+    return {
+        'id': turno.id,
+        'numero': turno.numero,
+        'categoria_id': turno.categoria_id,
+        'categoria': nombres[turno.categoria_id] if nombres else nombre_categoria(turno.categoria_id),
+        'estado': turno.estado,
+        'fecha_creacion': turno.fecha_creacion.isoformat(),
+        'hora_estimada': hora_estimada.isoformat() if hora_estimada else None,
+        'hora_inicio': hora_inicio.isoformat() if hora_inicio else None,
+        'hora_fin': hora_fin.isoformat() if hora_fin else None,
+        'sucursal_id': turno.sucursal_id
+    }
+
+# Campos que se pueden pedir con ?campos= en los listados
+CAMPOS_TURNO = (
+    'id', 'numero', 'categoria_id', 'categoria', 'estado', 'fecha_creacion',
+    'hora_estimada', 'hora_inicio', 'hora_fin', 'sucursal_id'
+)
+
+def serializar_turnos(filas, campos=None):
+    """Serializa una lista de turnos resolviendo los nombres de categoría una sola vez"""
+    nombres = catalogo_categorias.nombres()
+    if any(fila.categoria_id not in nombres for fila in filas):
+        catalogo_categorias.invalidar(compartir=False)
+        nombres = catalogo_categorias.nombres()
+    turnos = [serializar_turno(fila, nombres) for fila in filas]
+    if campos:
+        turnos = [{campo: turno[campo] for campo in campos} for turno in turnos]
+    return turnos
+
+def codificar_cursor(fila):
+    """Cursor opaco con la posición (fecha_creacion, id) de la última fila de una página"""
+    valor = f'{fila.fecha_creacion.isoformat()}|{fila.id}'
+    return base64.urlsafe_b64encode(valor.encode()).decode()
+
+def decodificar_cursor(cursor):
+    """Devuelve (fecha_creacion, id) o lanza ValueError si el cursor es inválido"""
+    try:
+        fecha, turno_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(fecha), int(turno_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('cursor inválido') from e
+
+# =============================================================================
+# CAMBIOS DE ESTADO DE TURNOS
+# =============================================================================
+def registrar_cambio_turno(tipo, turno, operador_id=None):
+    """Actualiza las colas, el estimador y las pantallas en memoria y publica el cambio a los suscriptores"""
+    anterior = motor_colas.actualizar(turno.id, turno.categoria_id, turno.numero, turno.estado, turno.fecha_creacion)
+    pantalla_sala.actualizar({turno.categoria_id, anterior} - {None})
+    if operador_id is not None:
+        estimador_espera.registrar_operador(turno.categoria_id, operador_id)
+    if tipo == 'turno_completado' and turno.hora_inicio and turno.hora_fin:
+        estimador_espera.registrar_atencion(turno.categoria_id, (turno.hora_fin - turno.hora_inicio).total_seconds())
+    cache_estadisticas.invalidar()
+    publicar_evento(tipo, serializar_turno(turno))
+
+def registrar_cambios_lote(tipo, filas):
+    """
+    Como registrar_cambio_turno para filas con COLUMNAS_TURNO de una operación masiva.
+    Los cierres masivos no son atenciones reales y no alimentan al estimador.
+    """
+    categorias = set()
+    for fila in filas:
+        categorias.add(fila.categoria_id)
+        # Al reasignar también cambia la categoría de la que sale el turno
+        categorias.add(motor_colas.actualizar(fila.id, fila.categoria_id, fila.numero, fila.estado, fila.fecha_creacion))
+    pantalla_sala.actualizar(categorias - {None})
+    cache_estadisticas.invalidar()
+    nombres = catalogo_categorias.nombres()
+    for fila in filas:
+        publicar_evento(tipo, serializar_turno(fila, nombres))
+
+def liberar_reservas():
+    """Encola los turnos importados cuya hora llegó y actualiza sus pantallas"""
+    categorias = motor_colas.liberar()
+    if categorias:
+        pantalla_sala.actualizar(categorias)
+
+def bus_sucursal(sucursal_id):
+    """Bus de eventos de una sucursal (se crea con el primer evento o suscriptor)"""
+    bus = buses_sucursal.get(sucursal_id)
+    if bus is None:
+        with _buses_lock:
+            bus = buses_sucursal.setdefault(sucursal_id, BusEventos(current_app.config['EVENTOS_BUFFER']))
+    return bus
+
+def publicar_evento(tipo, turno):
+    """Publica un turno serializado en el bus general y en el de su sucursal"""
+    bus_eventos.publicar(tipo, turno)
+    bus_sucursal(turno['sucursal_id']).publicar(tipo, turno)
+
+def segundos_espera(categoria_id, adelante):
+    """Espera estimada con `adelante` turnos antes; tiempo_estimado de la categoría hasta tener datos"""
+    categoria = catalogo_categorias.obtener(categoria_id)
+    minutos = (categoria and categoria['tiempo_estimado']) or current_app.config['TIEMPO_ESTIMADO_DEFAULT']
+    return estimador_espera.segundos_espera(
+        categoria_id, adelante, minutos * 60, ocupados=motor_colas.cantidad_en_atencion(categoria_id)
+    )
+
+# =============================================================================
+# CREACION AGRUPADA DE TURNOS
+# =============================================================================
+def insertar_turnos(categorias):
+    """
+    Crea un turno por cada categoría (dicts del catálogo) en una sola transacción
+    y devuelve las filas con COLUMNAS_TURNO en el mismo orden. Lo usa el escritor
+    agrupado para que una ráfaga de kioscos cueste un commit.
+    """
+    ahora = datetime.now()
+    cantidades = {}
+    for categoria in categorias:
+        cantidades[categoria['id']] = cantidades.get(categoria['id'], 0) + 1
     
-    # Crear categorías por defecto si no existen
-    if not Categoria.query.first():
-        categorias_default = [
-            Categoria(nombre='Atencion General', descripcion='Consultas generales', tiempo_estimado=15),
-            Categoria(nombre='Pagos', descripcion='Realizar pagos', tiempo_estimado=10),
-            Categoria(nombre='Reclamos', descripcion='Presentar reclamos', tiempo_estimado=20),
-            Categoria(nombre='Informes', descripcion='Solicitar informes', tiempo_estimado=25)
-        ]
-        db.session.add_all(categorias_default)
-        db.session.commit()
+    with db.engine.begin() as conexion:
+        # Contadores en orden fijo: dos transacciones nunca se bloquean en orden inverso
+        siguiente = {
+            categoria_id: _reservar_numeros(conexion, categoria_id, ahora.date(), cantidades[categoria_id])
+            - cantidades[categoria_id] + 1
+            for categoria_id in sorted(cantidades)
+        }
+        # Cada turno del lote cuenta los anteriores de su categoría en la espera
+        adelante = {categoria_id: motor_colas.cantidad_esperando(categoria_id) for categoria_id in cantidades}
+        filas = []
+        for categoria in categorias:
+            categoria_id = categoria['id']
+            filas.append({
+                'numero': siguiente[categoria_id],
+                'categoria_id': categoria_id,
+                'sucursal_id': categoria['sucursal_id'],
+                'estado': 'esperando',
+                'fecha_creacion': ahora,
+                'hora_estimada': ahora + timedelta(seconds=segundos_espera(categoria_id, adelante[categoria_id]))
+            })
+            siguiente[categoria_id] += 1
+            adelante[categoria_id] += 1
+        
+        insert = db.insert(Turno).returning(*COLUMNAS_TURNO, sort_by_parameter_order=True)
+        if conexion.dialect.insert_executemany_returning_sort_by_parameter_order:
+            turnos = conexion.execute(insert, filas).all()
+        else:
+            turnos = [conexion.execute(insert, fila).one() for fila in filas]
+    
+    # Las colas se actualizan antes del próximo lote para que su espera cuente este
+    registrar_cambios_lote('turno_creado', turnos)
+    return turnos
+
+escritor_turnos = EscritorAgrupado(insertar_turnos)
 
 # =============================================================================
-# API ENDPOINTS - CATEGORÍAS
+# API ENDPOINTS - CATEGORÍAS Y SUCURSALES
 # =============================================================================
-@app.route('/api/categorias', methods=['GET'])
+def respuesta_catalogo(contenido, etag):
+    """Respuesta JSON precodificada con ETag y Cache-Control para el catálogo"""
+    if request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+    else:
+        respuesta = Response(contenido, mimetype='application/json')
+    respuesta.set_etag(etag)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = current_app.config['CATEGORIAS_MAX_AGE']
+    return respuesta
+
+@api.route('/api/categorias', methods=['GET'])
 def api_categorias():
-    """Obtener todas las categorías activas"""
-    categorias = Categoria.query.filter_by(activa=True).all()
-    return jsonify([{
-        'id': c.id,
-        'nombre': c.nombre,
-        'descripcion': c.descripcion,
-        'tiempo_estimado': c.tiempo_estimado
-    } for c in categorias])
+    """Obtener las categorías activas (de una sucursal con ?sucursal_id=)"""
+    return respuesta_catalogo(*catalogo_categorias.activas_json(request.args.get('sucursal_id', type=int)))
 
-@app.route('/api/categorias/<int:categoria_id>', methods=['GET'])
+@api.route('/api/categorias/<int:categoria_id>', methods=['GET'])
 def api_categoria(categoria_id):
     """Obtener una categoría específica"""
-    categoria = Categoria.query.get_or_404(categoria_id)
-    return jsonify({
-        'id': categoria.id,
-        'nombre': categoria.nombre,
-        'descripcion': categoria.descripcion,
-        'tiempo_estimado': categoria.tiempo_estimado,
-        'activa': categoria.activa
-    })
+    categoria = catalogo_categorias.categoria_json(categoria_id)
+    if categoria is None:
+        abort(404)
+    return respuesta_catalogo(*categoria)
+
+@api.route('/api/sucursales', methods=['GET'])
+def api_sucursales():
+    """Obtener las sucursales activas"""
+    sucursales = Sucursal.query.filter_by(activa=True).order_by(Sucursal.id).all()
+    return jsonify([{'id': s.id, 'nombre': s.nombre} for s in sucursales])
 
 # =============================================================================
 # API ENDPOINTS - TURNOS
 # =============================================================================
-@app.route('/api/turnos', methods=['GET'])
+@api.route('/api/turnos', methods=['GET'])
 def api_turnos():
-    """Obtener turnos con filtros opcionales"""
+    """
+    Obtener turnos con filtros opcionales, paginados por cursor.
+    Parámetros: estado, categoria_id, sucursal_id, desde/hasta (ISO, por defecto el día de hoy),
+    limite, cursor (del header X-Siguiente-Cursor) y campos (lista separada por comas).
+    """
+    return listar_turnos(Turno, desde_por_defecto=rango_dia(datetime.now().date())[0])
+
+@api.route('/api/turnos/historico', methods=['GET'])
+@admin_requerido
+def api_turnos_historico():
+    """Turnos archivados; mismos parámetros que GET /api/turnos, sin límite de fecha por defecto"""
+    return listar_turnos(TurnoHistorico)
+
+def listar_turnos(modelo, desde_por_defecto=None):
+    """Página de turnos de `modelo` (Turno o TurnoHistorico) según los parámetros del request"""
     estado = request.args.get('estado')
     categoria_id = request.args.get('categoria_id', type=int)
+    sucursal_id = request.args.get('sucursal_id', type=int)
     
-    query = Turno.query
+    try:
+        desde = request.args.get('desde')
+        desde = datetime.fromisoformat(desde) if desde else desde_por_defecto
+        hasta = request.args.get('hasta')
+        hasta = datetime.fromisoformat(hasta) if hasta else None
+        cursor = request.args.get('cursor')
+        cursor = decodificar_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({'error': 'Parámetros de fecha o cursor inválidos'}), 400
     
+    limite = request.args.get('limite', current_app.config['TURNOS_LIMITE_PAGINA'], type=int)
+    limite = max(1, min(limite, current_app.config['TURNOS_LIMITE_PAGINA_MAX']))
+    
+    campos = request.args.get('campos')
+    campos = [c.strip() for c in campos.split(',') if c.strip()] if campos else None
+    if campos and any(c not in CAMPOS_TURNO for c in campos):
+        return jsonify({'error': f'campos válidos: {", ".join(CAMPOS_TURNO)}'}), 400
+    
+    query = db.session.query(*columnas_turno(modelo))
+    
+    if sucursal_id:
+        query = query.filter(modelo.sucursal_id == sucursal_id)
+    if desde:
+        query = query.filter(modelo.fecha_creacion >= desde)
+    if hasta:
+        query = query.filter(modelo.fecha_creacion < hasta)
     if estado:
-        query = query.filter_by(estado=estado)
+        query = query.filter(modelo.estado == estado)
     if categoria_id:
-        query = query.filter_by(categoria_id=categoria_id)
-    
-    turnos = query.order_by(Turno.fecha_creacion).all()
-    
-    return jsonify([{
-        'id': t.id,
-        'numero': t.numero,
-        'categoria_id': t.categoria_id,
-        'categoria': t.categoria.nombre,
-        'estado': t.estado,
-        'fecha_creacion': t.fecha_creacion.isoformat(),
-        'hora_estimada': t.hora_estimada.isoformat() if t.hora_estimada else None,
-        'hora_inicio': t.hora_inicio.isoformat() if t.hora_inicio else None,
-        'hora_fin': t.hora_fin.isoformat() if t.hora_fin else None
-    } for t in turnos])
-
-@app.route('/api/turnos', methods=['POST'])
+        query = query.filter(modelo.categoria_id == categoria_id)
+    if cursor:
+        query = query.filter(db.tuple_(modelo.fecha_creacion, modelo.id) > cursor)
+    
+    # Una fila extra indica si hay página siguiente
+    filas = query.order_by(modelo.fecha_creacion, modelo.id).limit(limite + 1).all()
+    siguiente = codificar_cursor(filas[limite - 1]) if len(filas) > limite else None
+    filas = filas[:limite]
+    
+    # ETag a partir de las filas y de los nombres de categoría que agrega el serializador:
+    # si la página no cambió no se serializa nada
+    etag = hashlib.md5(repr((
+        campos, catalogo_categorias.etag_nombres(), [tuple(f) for f in filas]
+    )).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+    else:
+        respuesta = jsonify(serializar_turnos(filas, campos))
+    
+    respuesta.set_etag(etag)
+    if siguiente:
+        respuesta.headers['X-Siguiente-Cursor'] = siguiente
+    return respuesta
+
+@api.route('/api/turnos', methods=['POST'])
+@limitar_tasa(claves_limite_turnos)
 def api_crear_turno():
     """Crear un nuevo turno"""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     categoria_id = data.get('categoria_id')
     
     if not categoria_id:
         return jsonify({'error': 'categoria_id es requerido'}), 400
+    # El catálogo está indexado por enteros: aceptar también "1", como get_or_404, pero
+    # no true ni 1.7 (int() los convertiría en la categoría 1)
+    if isinstance(categoria_id, str) and categoria_id.isascii() and categoria_id.isdigit():
+        categoria_id = int(categoria_id)
+    if type(categoria_id) is not int:
+        return jsonify({'error': 'categoria_id debe ser un número entero'}), 400
     
-    categoria = Categoria.query.get_or_404(categoria_id)
+    categoria = catalogo_categorias.obtener(categoria_id)
+    if categoria is None:
+        abort(404)
     
-    # Obtener el último turno de la categoría
-    ultimo_turno = Turno.query.filter_by(categoria_id=categoria_id).order_by(Turno.numero.desc()).first()
-    nuevo_numero = 1 if not ultimo_turno else ultimo_turno.numero + 1
+    # Tope de la cola, desde memoria: se rechaza antes de tocar la base
+    maximo = current_app.config['MAX_TURNOS_POR_CATEGORIA']
+    if maximo and motor_colas.cantidad_esperando(categoria_id) >= maximo:
+        return jsonify({'error': 'La cola de esta categoría está completa'}), 409
     
-    # Calcular hora estimada
-    turnos_esperando = Turno.query.filter_by(categoria_id=categoria_id, estado='esperando').count()
-    tiempo_espera = turnos_esperando * categoria.tiempo_estimado
-    hora_estimada = datetime.now() + timedelta(minutes=tiempo_espera)
+    if current_app.config['TURNOS_ESCRITURA_AGRUPADA_MS']:
+        # El escritor agrupado inserta, numera, registra y publica el turno
+        return crear_turno_agrupado(categoria)
+    
+    nuevo_numero = asignar_numero(categoria_id)
+    
+    # Hora estimada según los tiempos de atención reales y los operadores activos
+    espera = segundos_espera(categoria_id, motor_colas.cantidad_esperando(categoria_id))
+    hora_estimada = datetime.now() + timedelta(seconds=espera)
     
     nuevo_turno = Turno(
         numero=nuevo_numero,
         categoria_id=categoria_id,
+        sucursal_id=categoria['sucursal_id'],
         hora_estimada=hora_estimada
     )
     
     db.session.add(nuevo_turno)
     db.session.commit()
+    registrar_cambio_turno('turno_creado', nuevo_turno)
     
-    return jsonify({
-        'id': nuevo_turno.id,
-        'numero': nuevo_turno.numero,
-        'categoria_id': nuevo_turno.categoria_id,
-        'categoria': categoria.nombre,
-        'estado': nuevo_turno.estado,
-        'fecha_creacion': nuevo_turno.fecha_creacion.isoformat(),
-        'hora_estimada': nuevo_turno.hora_estimada.isoformat()
-    }), 201
+    return jsonify(serializar_turno(nuevo_turno)), 201
 
-@app.route('/api/turnos/<int:turno_id>', methods=['GET'])
+def crear_turno_agrupado(categoria):
+    """Crea el turno con el escritor agrupado; 503 si no se escribe a tiempo o falla su lote"""
+    espera = current_app.config['TURNOS_ESCRITURA_TIMEOUT']
+    futuro = escritor_turnos.enviar(categoria)
+    try:
+        try:
+            turno = futuro.result(timeout=espera)
+        except FuturoVencido:
+            if futuro.cancel():
+                # Todavía no había entrado en un lote: no se creó ningún turno
+                return servicio_ocupado('Servicio ocupado, reintente en unos segundos')
+            # Su lote ya se está escribiendo: esperarlo una vez más antes de rendirse
+            turno = futuro.result(timeout=espera)
+    except FuturoVencido:
+        return servicio_ocupado('No se pudo confirmar el turno; puede haberse creado igualmente')
+    except SQLAlchemyError:
+        # El lote es una sola transacción (base bloqueada, deadlock): no se creó ninguno de sus turnos
+        return servicio_ocupado('No se pudo crear el turno, reintente en unos segundos')
+    return jsonify(serializar_turno(turno)), 201
+
+def servicio_ocupado(mensaje):
+    """503 con Retry-After para que el kiosco reintente"""
+    respuesta = jsonify({'error': mensaje})
+    respuesta.status_code = 503
+    respuesta.headers['Retry-After'] = '2'
+    return respuesta
+
+@api.route('/api/turnos/<int:turno_id>', methods=['GET'])
 def api_turno(turno_id):
-    """Obtener un turno específico"""
-    turno = Turno.query.get_or_404(turno_id)
+    """Obtener un turno específico (también si ya fue archivado)"""
+    turno = db.session.get(Turno, turno_id) or db.session.get(TurnoHistorico, turno_id)
+    if turno is None:
+        abort(404)
+    respuesta = serializar_turno(turno)
+    respuesta['posicion'] = motor_colas.posicion(turno.id)
+    respuesta['espera_estimada_minutos'] = None
+    if respuesta['posicion']:
+        espera = segundos_espera(turno.categoria_id, respuesta['posicion'] - 1)
+        respuesta['espera_estimada_minutos'] = round(espera / 60, 1)
+    return jsonify(respuesta)
+
+@api.route('/api/colas', methods=['GET'])
+def api_colas():
+    """Estado actual de las colas por categoría, de todas o de ?sucursal_id= (desde memoria)"""
+    sucursal_id = request.args.get('sucursal_id', type=int)
+    categorias = catalogo_categorias.ids_sucursal(sucursal_id) if sucursal_id else None
+    resumen = motor_colas.resumen(categorias)
+    colas = []
+    for categoria_id, cola in sorted(resumen.items()):
+        siguiente = cola['siguiente']
+        colas.append({
+            'categoria_id': categoria_id,
+            'esperando': cola['esperando'],
+            'en_atencion': cola['en_atencion'],
+            'siguiente': {'id': siguiente[0], 'numero': siguiente[1]} if siguiente else None,
+            # Espera de un turno que se saque ahora
+            'espera_estimada_minutos': round(segundos_espera(categoria_id, cola['esperando']) / 60, 1)
+        })
+    return jsonify(colas)
+
+@api.route('/api/colas/<int:categoria_id>', methods=['GET'])
+def api_cola(categoria_id):
+    """Turnos en espera de una categoría con su hora estimada actual (desde memoria)"""
+    categoria = catalogo_categorias.obtener(categoria_id)
+    if categoria is None:
+        abort(404)
+    minutos = categoria['tiempo_estimado'] or current_app.config['TIEMPO_ESTIMADO_DEFAULT']
+    ocupados = motor_colas.cantidad_en_atencion(categoria_id)
+    ahora = datetime.now()
+    estimaciones = estimador_espera.estimar_cola(
+        categoria_id, motor_colas.esperando(categoria_id), minutos * 60, ocupados
+    )
     return jsonify({
-        'id': turno.id,
-        'numero': turno.numero,
-        'categoria_id': turno.categoria_id,
-        'categoria': turno.categoria.nombre,
-        'estado': turno.estado,
-        'fecha_creacion': turno.fecha_creacion.isoformat(),
-        'hora_estimada': turno.hora_estimada.isoformat() if turno.hora_estimada else None,
-        'hora_inicio': turno.hora_inicio.isoformat() if turno.hora_inicio else None,
-        'hora_fin': turno.hora_fin.isoformat() if turno.hora_fin else None
+        'categoria_id': categoria_id,
+        'en_atencion': ocupados,
+        'operadores': estimador_espera.operadores(categoria_id, ocupados),
+        'atencion_promedio_minutos': round(estimador_espera.tiempo_atencion(categoria_id, minutos * 60) / 60, 1),
+        'esperando': [{
+            'id': turno_id,
+            'numero': numero,
+            'posicion': posicion,
+            'hora_estimada': (ahora + timedelta(seconds=segundos)).isoformat()
+        } for posicion, ((turno_id, numero), segundos) in enumerate(estimaciones, start=1)]
     })
 
-@app.route('/api/iniciar_turno/<int:turno_id>', methods=['POST'])
-@jwt_required()
-def api_iniciar_turno(turno_id):
-    """Inicia la atención de un turno"""
-    usuario_id = get_jwt_identity()
-    usuario = Usuario.query.get(usuario_id)
+@api.route('/api/pantalla', methods=['GET'])
+def api_pantalla():
+    """
+    Lo que muestran las pantallas de sala (?sucursal_id=, por defecto la principal):
+    por categoría activa, números en atención, próximos en espera y cantidad esperando.
+    Se sirve ya codificado desde memoria; con If-None-Match responde 304 si no cambió.
+    """
+    sucursal_id = request.args.get('sucursal_id', SUCURSAL_POR_DEFECTO, type=int)
+    if not catalogo_categorias.ids_sucursal(sucursal_id):
+        # Sucursal desconocida: no guardar una pantalla por cada id que llegue en la URL
+        abort(404)
+    contenido, etag = pantalla_sala.obtener(sucursal_id)
+    if request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+    else:
+        respuesta = Response(contenido, mimetype='application/json')
+    respuesta.set_etag(etag)
+    # Las pantallas consultan seguido: siempre revalidar con el ETag
+    respuesta.cache_control.no_cache = True
+    return respuesta
+
+@api.route('/api/turnos/eventos', methods=['GET'])
+def api_eventos_turnos():
+    """Stream (Server-Sent Events) de cambios de turnos, de todas o de ?sucursal_id="""
+    # Reanudar desde el último evento recibido (header estándar o query param)
+    ultimo_id = request.headers.get('Last-Event-ID') or request.args.get('ultimo_id')
+    try:
+        ultimo_id = int(ultimo_id) if ultimo_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID inválido'}), 400
     
-    if not usuario or not usuario.es_admin:
-        return jsonify({'error': 'Acceso denegado'}), 403
+    # Cada sucursal tiene su propio bus: sus pantallas no se despiertan por las demás
+    sucursal_id = request.args.get('sucursal_id', type=int)
+    if sucursal_id and not catalogo_categorias.ids_sucursal(sucursal_id):
+        # Sucursal desconocida: no crear un bus por cada id que llegue en la URL
+        abort(404)
+    bus = bus_sucursal(sucursal_id) if sucursal_id else bus_eventos
     
+    return Response(
+        flujo_sse(bus, ultimo_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@api.route('/api/iniciar_turno/<int:turno_id>', methods=['POST'])
+@admin_requerido
+def api_iniciar_turno(turno_id):
+    """Inicia la atención de un turno"""
     turno = Turno.query.get_or_404(turno_id)
     turno.estado = 'en_atencion'
     turno.hora_inicio = datetime.now()
     db.session.commit()
+    registrar_cambio_turno('turno_iniciado', turno, operador_id=usuario_actual_id())
     
     return jsonify({
         'success': True,
@@ -228,20 +1167,15 @@ def api_iniciar_turno(turno_id):
         }
     })
 
-@app.route('/api/completar_turno/<int:turno_id>', methods=['POST'])
-@jwt_required()
+@api.route('/api/completar_turno/<int:turno_id>', methods=['POST'])
+@admin_requerido
 def api_completar_turno(turno_id):
     """Marca un turno como completado"""
-    usuario_id = get_jwt_identity()
-    usuario = Usuario.query.get(usuario_id)
-    
-    if not usuario or not usuario.es_admin:
-        return jsonify({'error': 'Acceso denegado'}), 403
-    
     turno = Turno.query.get_or_404(turno_id)
     turno.estado = 'completado'
     turno.hora_fin = datetime.now()
     db.session.commit()
+    registrar_cambio_turno('turno_completado', turno, operador_id=usuario_actual_id())
     
     return jsonify({
         'success': True,
@@ -254,19 +1188,14 @@ def api_completar_turno(turno_id):
         }
     })
 
-@app.route('/api/cancelar_turno/<int:turno_id>', methods=['POST'])
-@jwt_required()
+@api.route('/api/cancelar_turno/<int:turno_id>', methods=['POST'])
+@admin_requerido
 def api_cancelar_turno(turno_id):
     """Cancela un turno"""
-    usuario_id = get_jwt_identity()
-    usuario = Usuario.query.get(usuario_id)
-    
-    if not usuario or not usuario.es_admin:
-        return jsonify({'error': 'Acceso denegado'}), 403
-    
     turno = Turno.query.get_or_404(turno_id)
     turno.estado = 'cancelado'
     db.session.commit()
+    registrar_cambio_turno('turno_cancelado', turno)
     
     return jsonify({
         'success': True,
@@ -278,10 +1207,255 @@ def api_cancelar_turno(turno_id):
         }
     })
 
+@api.route('/api/llamar_siguiente', methods=['POST'])
+@admin_requerido
+def api_llamar_siguiente():
+    """
+    Llama al próximo turno en espera de una o varias categorías y lo pone en atención.
+    Body: categoria_id, categorias (lista), pesos ({categoria_id: peso}) o sucursal_id
+    (todas las categorías activas de la sucursal); opcionalmente
+    completar_turno_id para cerrar el turno anterior del puesto en la misma transacción.
+    Entre varias categorías se elige el turno con mayor espera ponderada por el peso.
+    """
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        if data.get('pesos'):
+            pesos = {int(k): float(v) for k, v in data['pesos'].items()}
+        elif data.get('categorias'):
+            pesos = {categoria_id: 1.0 for categoria_id in lista_de_ids(data['categorias'])}
+        elif data.get('categoria_id'):
+            pesos = {int(data['categoria_id']): 1.0}
+        elif data.get('sucursal_id'):
+            pesos = {c: 1.0 for c in catalogo_categorias.activas_sucursal(int(data['sucursal_id']))}
+            if not pesos:
+                return jsonify({'error': 'La sucursal no tiene categorías activas'}), 404
+        else:
+            return jsonify({'error': 'categoria_id, categorias, pesos o sucursal_id es requerido'}), 400
+        completar_id = data.get('completar_turno_id')
+        completar_id = int(completar_id) if completar_id else None
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({'error': 'Parámetros inválidos'}), 400
+    
+    ahora = datetime.now()
+    completado_id = None
+    
+    if completar_id:
+        resultado = db.session.execute(
+            db.update(Turno)
+            .where(Turno.id == completar_id, Turno.estado == 'en_atencion')
+            .values(estado='completado', hora_fin=ahora)
+            .execution_options(synchronize_session=False)
+        )
+        completado_id = completar_id if resultado.rowcount else None
+    
+    llamado_id = None
+    for _ in range(5):
+        # Primer turno en espera de cada categoría
+        candidatos = []
+        for categoria_id, peso in pesos.items():
+            # Las reservas importadas no se llaman antes de su hora
+            fila = db.session.query(Turno.id, Turno.fecha_creacion).filter(
+                Turno.categoria_id == categoria_id,
+                Turno.estado == 'esperando',
+                Turno.fecha_creacion <= ahora
+            ).order_by(Turno.id).first()
+            if fila:
+                espera = (ahora - fila.fecha_creacion).total_seconds()
+                candidatos.append((-peso * espera, fila.id))
+        if not candidatos:
+            break
+        
+        # Asignación condicional: si otro puesto lo tomó primero, no se actualiza nada
+        candidato_id = min(candidatos)[1]
+        resultado = db.session.execute(
+            db.update(Turno)
+            .where(Turno.id == candidato_id, Turno.estado == 'esperando')
+            .values(estado='en_atencion', hora_inicio=ahora)
+            .execution_options(synchronize_session=False)
+        )
+        if resultado.rowcount:
+            llamado_id = candidato_id
+            break
+    
+    db.session.commit()
+    
+    # El operador cuenta solo en la categoría del turno que atiende: registrarlo en
+    # todas las pedidas multiplicaría su capacidad por la cantidad de categorías
+    operador_id = usuario_actual_id()
+    respuesta = {'success': True, 'turno': None, 'completado': None}
+    if completado_id:
+        completado = db.session.get(Turno, completado_id)
+        registrar_cambio_turno('turno_completado', completado, operador_id=operador_id)
+        respuesta['completado'] = serializar_turno(completado)
+    if llamado_id:
+        turno = db.session.get(Turno, llamado_id)
+        registrar_cambio_turno('turno_iniciado', turno, operador_id=operador_id)
+        respuesta['turno'] = serializar_turno(turno)
+        respuesta['mensaje'] = f'Turno #{turno.numero} llamado'
+    else:
+        respuesta['mensaje'] = 'No hay turnos en espera'
+    return jsonify(respuesta)
+
+# Estados desde los que se aplica cada acción masiva y evento que publica
+ACCIONES_LOTE = {
+    'cancelar': (('esperando', 'en_atencion'), 'turno_cancelado'),
+    'completar': (('en_atencion',), 'turno_completado'),
+    'reasignar': (('esperando',), 'turno_reasignado'),
+}
+
+@api.route('/api/turnos/lote', methods=['POST'])
+@admin_requerido
+def api_turnos_lote():
+    """
+    Cancela, completa o reasigna muchos turnos con un único UPDATE.
+    Body: accion (cancelar, completar o reasignar); ids (lista) o filtro con al menos
+    uno de categoria_id, sucursal_id, estado, antiguedad_minutos o antes_de (ISO); y categoria_destino
+    para reasignar. Solo se modifican los turnos en un estado válido para la acción; los
+    reasignados reciben números nuevos de la categoría destino.
+    """
+    data = request.get_json(silent=True) or {}
+    accion = data.get('accion')
+    if accion not in ACCIONES_LOTE:
+        return jsonify({'error': f'accion válidas: {", ".join(ACCIONES_LOTE)}'}), 400
+    estados, tipo = ACCIONES_LOTE[accion]
+    ahora = datetime.now()
+    condiciones = [Turno.estado.in_(estados)]
+    
+    try:
+        if data.get('ids') is not None:
+            ids = lista_de_ids(data['ids'])
+            if len(ids) > current_app.config['TURNOS_LOTE_MAX']:
+                return jsonify({'error': f'Máximo {current_app.config["TURNOS_LOTE_MAX"]} ids por operación'}), 400
+            condiciones.append(Turno.id.in_(ids))
+        elif data.get('filtro'):
+            filtro = data['filtro']
+            if filtro.get('categoria_id'):
+                condiciones.append(Turno.categoria_id == int(filtro['categoria_id']))
+            if filtro.get('sucursal_id'):
+                condiciones.append(Turno.sucursal_id == int(filtro['sucursal_id']))
+            if filtro.get('estado'):
+                condiciones.append(Turno.estado == filtro['estado'])
+            if filtro.get('antiguedad_minutos') is not None:
+                condiciones.append(Turno.fecha_creacion <= ahora - timedelta(minutes=float(filtro['antiguedad_minutos'])))
+            if filtro.get('antes_de'):
+                condiciones.append(Turno.fecha_creacion < datetime.fromisoformat(filtro['antes_de']))
+            if len(condiciones) == 1:
+                return jsonify({'error': 'El filtro no tiene criterios'}), 400
+        else:
+            return jsonify({'error': 'ids o filtro es requerido'}), 400
+        
+        if accion == 'cancelar':
+            valores = {'estado': 'cancelado'}
+        elif accion == 'completar':
+            valores = {'estado': 'completado', 'hora_fin': ahora}
+        else:
+            destino = catalogo_categorias.obtener(int(data['categoria_destino']))
+            if destino is None:
+                return jsonify({'error': 'categoria_destino no existe'}), 404
+            valores = {'categoria_id': destino['id'], 'sucursal_id': destino['sucursal_id']}
+            condiciones.append(Turno.categoria_id != destino['id'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Parámetros inválidos'}), 400
+    
+    update = db.update(Turno).values(**valores).execution_options(synchronize_session=False)
+    if db.engine.dialect.update_returning:
+        filas = db.session.execute(update.where(*condiciones).returning(*COLUMNAS_TURNO)).all()
+    else:
+        # Sin RETURNING: fijar primero las filas afectadas
+        ids = db.session.scalars(db.select(Turno.id).where(*condiciones).with_for_update()).all()
+        db.session.execute(update.where(Turno.id.in_(ids)))
+        filas = db.session.query(*COLUMNAS_TURNO).filter(Turno.id.in_(ids)).all()
+    if accion == 'reasignar' and filas:
+        # Números nuevos de la categoría destino, en la misma transacción y por orden de llegada
+        filas = renumerar_turnos(sorted(f.id for f in filas), destino['id'], ahora.date())
+    db.session.commit()
+    
+    registrar_cambios_lote(tipo, filas)
+    respuesta = {'success': True, 'accion': accion, 'afectados': len(filas), 'ids': [f.id for f in filas]}
+    if accion == 'reasignar':
+        respuesta['turnos'] = serializar_turnos(filas)
+    return jsonify(respuesta)
+
+def renumerar_turnos(ids, categoria_id, fecha):
+    """
+    Da a los turnos `ids` (ya movidos a la categoría) números consecutivos nuevos
+    de su numeración del día, para que no repitan uno existente. Devuelve las
+    filas actualizadas con COLUMNAS_TURNO.
+    """
+    ultimo = _reservar_numeros(db.session.connection(), categoria_id, fecha, len(ids))
+    tabla = Turno.__table__
+    db.session.execute(
+        tabla.update().where(tabla.c.id == db.bindparam('turno_id')).values(numero=db.bindparam('nuevo_numero')),
+        [{'turno_id': turno_id, 'nuevo_numero': ultimo - len(ids) + 1 + i} for i, turno_id in enumerate(ids)]
+    )
+    return db.session.query(*COLUMNAS_TURNO).filter(Turno.id.in_(ids)).order_by(Turno.id).all()
+
+@api.route('/api/turnos/importar', methods=['POST'])
+@admin_requerido
+def api_importar_turnos():
+    """
+    Crea turnos reservados de antemano en una sola transacción.
+    Body: turnos, lista de {categoria_id, hora (ISO, hora reservada de hoy)}. Se numeran
+    en orden de hora y cada uno entra en la cola (y se puede llamar) recién a su hora.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        reservas = sorted(
+            ((datetime.fromisoformat(t['hora']), int(t['categoria_id'])) for t in data['turnos']),
+            key=lambda reserva: reserva[0]
+        )
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({'error': 'turnos debe ser una lista de {categoria_id, hora}'}), 400
+    if not reservas or len(reservas) > current_app.config['TURNOS_LOTE_MAX']:
+        return jsonify({'error': f'Entre 1 y {current_app.config["TURNOS_LOTE_MAX"]} turnos por importación'}), 400
+    
+    # Los turnos entran a la cola de hoy con la numeración de hoy: no se aceptan otros días
+    hoy = datetime.now().date()
+    if reservas[0][0].date() != hoy or reservas[-1][0].date() != hoy:
+        return jsonify({'error': 'Solo se importan turnos con hora de hoy'}), 400
+    
+    cantidades = {}
+    for _, categoria_id in reservas:
+        cantidades[categoria_id] = cantidades.get(categoria_id, 0) + 1
+    inexistentes = sorted(c for c in cantidades if catalogo_categorias.obtener(c) is None)
+    if inexistentes:
+        return jsonify({'error': f'Categorías inexistentes: {inexistentes}'}), 404
+    
+    # Un rango de números por categoría, en la misma transacción que los turnos y
+    # en orden fijo de categoría (como insertar_turnos) para no bloquearse en orden inverso
+    ahora = datetime.now()
+    conexion = db.session.connection()
+    siguiente = {
+        categoria_id: _reservar_numeros(conexion, categoria_id, ahora.date(), cantidades[categoria_id])
+        - cantidades[categoria_id] + 1
+        for categoria_id in sorted(cantidades)
+    }
+    turnos = []
+    for hora, categoria_id in reservas:
+        turnos.append(Turno(
+            numero=siguiente[categoria_id],
+            categoria_id=categoria_id,
+            sucursal_id=catalogo_categorias.obtener(categoria_id)['sucursal_id'],
+            estado='esperando',
+            fecha_creacion=hora,  # la reserva llega a la cola a su hora
+            hora_estimada=hora
+        ))
+        siguiente[categoria_id] += 1
+    db.session.add_all(turnos)
+    db.session.flush()
+    ids = [turno.id for turno in turnos]
+    db.session.commit()
+    
+    filas = db.session.query(*COLUMNAS_TURNO).filter(Turno.id.in_(ids)).order_by(Turno.id).all()
+    registrar_cambios_lote('turno_creado', filas)
+    return jsonify({'success': True, 'creados': len(filas), 'turnos': serializar_turnos(filas)}), 201
+
 # =============================================================================
 # API ENDPOINTS - AUTENTICACIÓN
 # =============================================================================
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
+@limitar_tasa(claves_limite_login)
 def api_login():
     """Login API con JWT"""
     data = request.get_json()
@@ -294,7 +1468,7 @@ def api_login():
     usuario = Usuario.query.filter_by(email=email).first()
     
     if usuario and check_password_hash(usuario.password_hash, password):
-        access_token = create_access_token(identity=usuario.id)
+        access_token = crear_token(usuario)
         return jsonify({
             'access_token': access_token,
             'user': {
@@ -307,7 +1481,8 @@ def api_login():
     
     return jsonify({'error': 'Email o contraseña incorrectos'}), 401
 
-@app.route('/api/auth/register', methods=['POST'])
+@api.route('/api/auth/register', methods=['POST'])
+@limitar_tasa(claves_limite_login)
 def api_register():
     """Registro de usuario"""
     data = request.get_json()
@@ -327,7 +1502,7 @@ def api_register():
     db.session.add(nuevo_usuario)
     db.session.commit()
     
-    access_token = create_access_token(identity=nuevo_usuario.id)
+    access_token = crear_token(nuevo_usuario)
     return jsonify({
         'access_token': access_token,
         'user': {
@@ -338,50 +1513,186 @@ def api_register():
         }
     }), 201
 
-@app.route('/api/auth/me', methods=['GET'])
+@api.route('/api/auth/me', methods=['GET'])
 @jwt_required()
 def api_me():
     """Obtener información del usuario actual"""
-    usuario_id = get_jwt_identity()
-    usuario = Usuario.query.get_or_404(usuario_id)
-    
-    return jsonify({
-        'id': usuario.id,
-        'nombre': usuario.nombre,
-        'email': usuario.email,
-        'es_admin': usuario.es_admin
-    })
+    usuario = obtener_usuario(usuario_actual_id())
+    if usuario is None:
+        abort(404)
+    return jsonify(usuario)
+
+@api.route('/api/auth/logout', methods=['POST'])
+@jwt_required()
+def api_logout():
+    """Cerrar sesión: revoca los tokens emitidos para el usuario actual"""
+    revocar_tokens(usuario_actual_id())
+    return jsonify({'success': True})
 
 # =============================================================================
 # API ENDPOINTS - ESTADÍSTICAS
 # =============================================================================
-@app.route('/api/estadisticas', methods=['GET'])
-@jwt_required()
+@api.route('/api/estadisticas', methods=['GET'])
+@admin_requerido
 def api_estadisticas():
-    """Obtener estadísticas del día"""
-    usuario_id = get_jwt_identity()
-    usuario = Usuario.query.get(usuario_id)
+    """Obtener estadísticas del día, de todas las sucursales o de ?sucursal_id="""
+    hoy = datetime.now().date()
+    sucursal_id = request.args.get('sucursal_id', type=int)
+    return jsonify(cache_estadisticas.obtener(
+        (hoy, sucursal_id), lambda: calcular_estadisticas(hoy, sucursal_id)
+    ))
+
+def calcular_estadisticas(fecha, sucursal_id=None):
+    """Conteos y tiempos promedio del día, agregados en SQL por categoría y estado"""
+    inicio, fin = rango_dia(fecha)
+    filtros = [Turno.fecha_creacion >= inicio, Turno.fecha_creacion < fin]
+    if sucursal_id:
+        filtros.append(Turno.sucursal_id == sucursal_id)
+    espera = segundos_entre(Turno.fecha_creacion, Turno.hora_inicio)
+    atencion = segundos_entre(Turno.hora_inicio, Turno.hora_fin)
     
-    if not usuario or not usuario.es_admin:
-        return jsonify({'error': 'Acceso denegado'}), 403
+    filas = db.session.query(
+        Turno.categoria_id,
+        Categoria.nombre,
+        Turno.estado,
+        db.func.count(Turno.id),
+        db.func.sum(espera),
+        db.func.count(Turno.hora_inicio),
+        db.func.sum(atencion),
+        db.func.count(atencion)
+    ).join(Categoria, Categoria.id == Turno.categoria_id).filter(
+        *filtros
+    ).group_by(Turno.categoria_id, Categoria.nombre, Turno.estado).all()
     
-    hoy = datetime.now().date()
-    turnos_hoy = Turno.query.filter(
-        db.func.date(Turno.fecha_creacion) == hoy
-    ).all()
+    def nuevo_resumen():
+        return {'total': 0, 'esperando': 0, 'en_atencion': 0, 'completados': 0, 'cancelados': 0,
+                '_espera': 0.0, '_n_espera': 0, '_atencion': 0.0, '_n_atencion': 0}
     
-    return jsonify({
-        'total': len(turnos_hoy),
-        'esperando': len([t for t in turnos_hoy if t.estado == 'esperando']),
-        'en_atencion': len([t for t in turnos_hoy if t.estado == 'en_atencion']),
-        'completados': len([t for t in turnos_hoy if t.estado == 'completado']),
-        'cancelados': len([t for t in turnos_hoy if t.estado == 'cancelado'])
-    })
+    claves_estado = {'esperando': 'esperando', 'en_atencion': 'en_atencion',
+                     'completado': 'completados', 'cancelado': 'cancelados'}
+    general = nuevo_resumen()
+    por_categoria = {}
+    
+    for categoria_id, nombre, estado, cantidad, suma_espera, n_espera, suma_atencion, n_atencion in filas:
+        if categoria_id not in por_categoria:
+            por_categoria[categoria_id] = dict(nuevo_resumen(), categoria_id=categoria_id, categoria=nombre)
+        for resumen in (general, por_categoria[categoria_id]):
+            resumen['total'] += cantidad
+            if estado in claves_estado:
+                resumen[claves_estado[estado]] += cantidad
+            resumen['_espera'] += suma_espera or 0
+            resumen['_n_espera'] += n_espera
+            resumen['_atencion'] += suma_atencion or 0
+            resumen['_n_atencion'] += n_atencion
+    
+    def cerrar(resumen):
+        # Promedios en minutos a partir de las sumas parciales
+        suma_espera, n_espera = resumen.pop('_espera'), resumen.pop('_n_espera')
+        suma_atencion, n_atencion = resumen.pop('_atencion'), resumen.pop('_n_atencion')
+        resumen['espera_promedio_minutos'] = round(suma_espera / n_espera / 60, 1) if n_espera else None
+        resumen['atencion_promedio_minutos'] = round(suma_atencion / n_atencion / 60, 1) if n_atencion else None
+        return resumen
+    
+    estadisticas = cerrar(general)
+    estadisticas['por_categoria'] = [cerrar(por_categoria[k]) for k in sorted(por_categoria)]
+    return estadisticas
+
+@api.route('/api/reportes', methods=['GET'])
+@admin_requerido
+def api_reportes():
+    """
+    Reporte de días cerrados leído de resumen_diario.
+    Parámetros: desde/hasta (YYYY-MM-DD inclusive, por defecto los últimos 7 días),
+    agrupar (dia, semana o mes) para la serie por período y sucursal_id.
+    """
+    ayer = datetime.now().date() - timedelta(days=1)
+    try:
+        hasta = request.args.get('hasta')
+        hasta = datetime.strptime(hasta, '%Y-%m-%d').date() if hasta else ayer
+        desde = request.args.get('desde')
+        desde = datetime.strptime(desde, '%Y-%m-%d').date() if desde else hasta - timedelta(days=6)
+    except ValueError:
+        return jsonify({'error': 'Las fechas deben tener formato YYYY-MM-DD'}), 400
+    
+    formatos_periodo = {'dia': '%Y-%m-%d', 'semana': '%G-W%V', 'mes': '%Y-%m'}
+    agrupar = request.args.get('agrupar', 'dia')
+    if agrupar not in formatos_periodo:
+        return jsonify({'error': f'agrupar válidos: {", ".join(formatos_periodo)}'}), 400
+    
+    sucursal_id = request.args.get('sucursal_id', type=int)
+    return jsonify(calcular_reporte(desde, hasta, formatos_periodo[agrupar], sucursal_id))
+
+def calcular_reporte(desde, hasta, formato_periodo, sucursal_id=None):
+    """Totales, promedios y desgloses por categoría, hora y período a partir de los resúmenes"""
+    sumas = (
+        db.func.sum(ResumenDiario.total),
+        db.func.sum(ResumenDiario.completados),
+        db.func.sum(ResumenDiario.cancelados),
+        db.func.sum(ResumenDiario.espera_segundos),
+        db.func.sum(ResumenDiario.espera_cantidad),
+        db.func.sum(ResumenDiario.atencion_segundos),
+        db.func.sum(ResumenDiario.atencion_cantidad)
+    )
+    en_rango = [ResumenDiario.fecha >= desde, ResumenDiario.fecha <= hasta]
+    if sucursal_id:
+        # Los resúmenes son por categoría y cada categoría es de una sola sucursal
+        en_rango.append(ResumenDiario.categoria_id.in_(catalogo_categorias.ids_sucursal(sucursal_id)))
+    por_dia_categoria = db.session.query(ResumenDiario.fecha, ResumenDiario.categoria_id, *sumas).filter(
+        *en_rango
+    ).group_by(ResumenDiario.fecha, ResumenDiario.categoria_id).all()
+    por_hora = db.session.query(ResumenDiario.hora, *sumas).filter(
+        *en_rango
+    ).group_by(ResumenDiario.hora).order_by(ResumenDiario.hora).all()
+    
+    def nuevo_resumen(**claves):
+        return dict(claves, total=0, completados=0, cancelados=0,
+                    _espera=0.0, _n_espera=0, _atencion=0.0, _n_atencion=0)
+    
+    def acumular(resumen, fila):
+        total, completados, cancelados, espera, n_espera, atencion, n_atencion = fila
+        resumen['total'] += total
+        resumen['completados'] += completados
+        resumen['cancelados'] += cancelados
+        resumen['_espera'] += espera
+        resumen['_n_espera'] += n_espera
+        resumen['_atencion'] += atencion
+        resumen['_n_atencion'] += n_atencion
+    
+    def cerrar(resumen):
+        # Promedios en minutos a partir de las sumas parciales
+        suma_espera, n_espera = resumen.pop('_espera'), resumen.pop('_n_espera')
+        suma_atencion, n_atencion = resumen.pop('_atencion'), resumen.pop('_n_atencion')
+        resumen['espera_promedio_minutos'] = round(suma_espera / n_espera / 60, 1) if n_espera else None
+        resumen['atencion_promedio_minutos'] = round(suma_atencion / n_atencion / 60, 1) if n_atencion else None
+        return resumen
+    
+    general = nuevo_resumen(desde=desde.isoformat(), hasta=hasta.isoformat())
+    por_categoria = {}
+    por_periodo = {}
+    nombres = catalogo_categorias.nombres()
+    for fecha, categoria_id, *fila in por_dia_categoria:
+        periodo = fecha.strftime(formato_periodo)
+        if categoria_id not in por_categoria:
+            por_categoria[categoria_id] = nuevo_resumen(categoria_id=categoria_id, categoria=nombres.get(categoria_id))
+        if periodo not in por_periodo:
+            por_periodo[periodo] = nuevo_resumen(periodo=periodo)
+        for resumen in (general, por_categoria[categoria_id], por_periodo[periodo]):
+            acumular(resumen, fila)
+    
+    reporte = cerrar(general)
+    reporte['por_categoria'] = [cerrar(por_categoria[k]) for k in sorted(por_categoria)]
+    reporte['por_hora'] = []
+    for hora, *fila in por_hora:
+        resumen = nuevo_resumen(hora=hora)
+        acumular(resumen, fila)
+        reporte['por_hora'].append(cerrar(resumen))
+    reporte['por_periodo'] = [cerrar(por_periodo[k]) for k in sorted(por_periodo)]
+    return reporte
 
 # =============================================================================
 # HEALTH CHECK
 # =============================================================================
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """Endpoint para verificar el estado del servidor"""
     return jsonify({
@@ -389,21 +1700,96 @@ def health_check():
         'message': 'API funcionando correctamente'
     })
 
+@api.route('/api/metricas', methods=['GET'])
+def api_metricas():
+    """Métricas en formato de texto de Prometheus"""
+    if not current_app.config['METRICAS_HABILITADAS']:
+        abort(404)
+    return Response(metricas.exportar(), mimetype='text/plain; version=0.0.4')
+
 # =============================================================================
-# INICIALIZACION Y EJECUCION
+# FABRICA DE LA APLICACION
+# =============================================================================
+def create_app(nombre_config=None):
+    """Crea y configura la aplicación sin tocar la base de datos"""
+    app = Flask(__name__)
+    # Entorno: development (por defecto), production o testing (ver config.py)
+    app.config.from_object(config[nombre_config or os.environ.get('TURNERO_ENV', 'default')])
+
+    # Configurar CORS para API
+    cors.init_app(app, resources={
+        r"/api/*": {
+            "origins": ["http://localhost:3000", "http://localhost:5173", "*"],  # Permitir todos en desarrollo
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match"],
+            "expose_headers": ["ETag", "X-Siguiente-Cursor"]
+        }
+    })
+
+    if app.config['PROXY_SALTOS']:
+        saltos = app.config['PROXY_SALTOS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=saltos, x_proto=saltos)
+
+    # El orden de las claves no importa a los clientes; ordenarlas encarece listados grandes
+    app.json.sort_keys = False
+
+    db.init_app(app)
+    jwt.init_app(app)
+
+    # Estado del proceso según la configuración
+    bus_eventos.redimensionar(app.config['EVENTOS_BUFFER'])
+    cache_usuarios.capacidad = app.config['USUARIOS_CACHE_TAMANO']
+    cache_estadisticas.ttl = app.config['ESTADISTICAS_CACHE_TTL']
+    catalogo_categorias.ttl = app.config['CATEGORIAS_CACHE_TTL']
+    catalogo_categorias.archivo_version = app.config['CATEGORIAS_VERSION_ARCHIVO']
+    metricas.umbral_sql_lenta = app.config['SQL_LENTA_MS'] / 1000
+    limitador_tasa.backend = crear_backend(app.config['RATE_LIMIT_BACKEND'])
+    estimador_espera.alfa = app.config['ESTIMADOR_ALFA']
+    estimador_espera.ventana_operadores = app.config['ESTIMADOR_VENTANA_OPERADORES']
+    estimador_espera.minimo_segundos = app.config['ESTIMADOR_MINIMO_SEGUNDOS']
+    escritor_turnos.ventana = app.config['TURNOS_ESCRITURA_AGRUPADA_MS'] / 1000
+    escritor_turnos.maximo = app.config['TURNOS_ESCRITURA_LOTE_MAX']
+    escritor_turnos.contexto = app.app_context
+    pantalla_sala.proximos = app.config['PANTALLA_PROXIMOS']
+
+    # Crear el engine no abre conexiones: los listeners se registran sin I/O
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            pragmas = app.config['SQLITE_PRAGMAS']
+
+            @event.listens_for(db.engine, 'connect')
+            def _aplicar_pragmas_sqlite(conexion_dbapi, registro):
+                """Configura cada conexión SQLite nueva con SQLITE_PRAGMAS"""
+                cursor = conexion_dbapi.cursor()
+                for nombre, valor in pragmas.items():
+                    cursor.execute(f'PRAGMA {nombre}={valor}')
+                cursor.close()
+
+        if app.config['METRICAS_HABILITADAS']:
+            metricas.instalar(app, db.engine)
+
+    app.before_request(_inicializar_proceso)
+    app.before_request(liberar_reservas)
+    app.register_blueprint(api)
+    app.cli.add_command(comando_init_db)
+    app.cli.add_command(comando_seed)
+    app.cli.add_command(comando_crear_sucursal)
+    app.cli.add_command(comando_archivar)
+    app.cli.add_command(comando_consolidar)
+    return app
+
+# Instancia para `gunicorn app:app` y `flask --app app`
+app = create_app()
+
+# =============================================================================
+# EJECUCION
 # =============================================================================
 if __name__ == '__main__':
-    # Crear usuario admin por defecto si no existe
     with app.app_context():
-        if not Usuario.query.filter_by(es_admin=True).first():
-            admin = Usuario(
-                nombre='Administrador',
-                email='admin@turnero.com',
-                password_hash=generate_password_hash('admin123'),
-                es_admin=True
-            )
-            db.session.add(admin)
-            db.session.commit()
+        inicializar_base()
+        # Crear usuario admin por defecto si no existe
+        if crear_admin_por_defecto():
             print("Usuario administrador creado: admin@turnero.com / admin123")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Servidor de desarrollo; en producción usar gunicorn (ver gunicorn.conf.py)
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# =============================================================================
+# SISTEMA DE TURNOS - BENCHMARK DE ARRANQUE EN FRIO
+# =============================================================================
+"""
+Mide el arranque en frío tal como lo ve un worker nuevo o una función
+serverless: cada medición corre en un proceso Python nuevo que importa app.py
+y atiende su primer request.
+
+Reporta el tiempo de import, el de import hasta la respuesta de /api/health
+(sin base de datos) y el de import hasta la respuesta de /api/categorias
+(primer request con base de datos), sobre una base SQLite ya inicializada,
+junto con la cantidad de sentencias SQL ejecutadas en cada etapa: con una
+base remota cada sentencia es al menos un viaje de red.
+
+Se mide con AUTO_INICIALIZAR_DB=1 (la base se verifica en el primer request)
+y con AUTO_INICIALIZAR_DB=0 (la base se prepara al desplegar con init-db).
+
+Uso: python benchmarks/arranque.py [--repeticiones 5]
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código que se ejecuta en cada proceso nuevo
+MEDICION = """
+import json, sys, time
+inicio = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+sentencias = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: sentencias.append(1))
+sys.path.insert(0, {raiz!r})
+import app as modulo
+importado = time.perf_counter()
+sql_import = len(sentencias)
+cliente = modulo.app.test_client()
+assert cliente.get({ruta!r}).status_code == 200
+respondido = time.perf_counter()
+print(json.dumps({{
+    'import': importado - inicio, 'total': respondido - inicio,
+    'sql_import': sql_import, 'sql_total': len(sentencias)
+}}))
+"""
+
+# =============================================================================
+# MEDICION
+# =============================================================================
+def medir(ruta, entorno):
+    salida = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', MEDICION.format(raiz=RAIZ, ruta=ruta)],
+        env=entorno, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de arranque en frío')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='turnero-arranque-')
+    try:
+        base = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directorio, 'arranque.db')}")
+        # Base ya creada: se mide el costo recurrente, no el de la primera instalación
+        subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'app', 'init-db'],
+            cwd=RAIZ, env=base, capture_output=True, check=True
+        )
+        subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'app', 'seed'],
+            cwd=RAIZ, env=base, capture_output=True, check=True
+        )
+        print(f"{'AUTO_INICIALIZAR_DB':<21}{'ruta':<18}{'import ms':>11}{'SQL':>5}{'+ request ms':>14}{'SQL':>5}")
+        for auto in ('1', '0'):
+            entorno = dict(base, AUTO_INICIALIZAR_DB=auto)
+            for ruta in ('/api/health', '/api/categorias'):
+                muestras = [medir(ruta, entorno) for _ in range(args.repeticiones)]
+                importar = statistics.median(m['import'] for m in muestras) * 1000
+                total = statistics.median(m['total'] for m in muestras) * 1000
+                print(f"{auto:<21}{ruta:<18}{importar:>11.1f}{muestras[0]['sql_import']:>5}"
+                      f"{total:>14.1f}{muestras[0]['sql_total']:>5}")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# =============================================================================
+# SISTEMA DE TURNOS - BENCHMARK DE CARGA DE LA API
+# =============================================================================
+"""
+Benchmark de carga reproducible de la API de turnos.
+
+Crea una base SQLite temporal con categorías, usuarios y meses de historial
+de turnos, y ejecuta contra la aplicación real (app.py) una mezcla de tráfico
+de kioscos y puestos de atención:
+  - kiosco:        POST /api/turnos
+  - panel:         GET /api/turnos?estado=esperando y GET /api/estadisticas
+  - puesto:        POST /api/llamar_siguiente (completando el turno anterior)
+  - iniciar/fin:   POST /api/iniciar_turno/<id> + POST /api/completar_turno/<id>
+
+Reporta por endpoint latencias p50/p95/p99, throughput y consultas SQL por
+request. Con --guardar se graba el resultado en JSON y con --comparar se
+contrasta contra un resultado previo, saliendo con código 1 si algún p95
+empeora más que la tolerancia (para usar antes de desplegar).
+
+Uso: python benchmarks/carga.py [--dias 90] [--turnos-por-dia 200] [--requests 2000] [--hilos 4]
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse
+import atexit
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# La base de prueba debe configurarse antes de importar la aplicación
+_directorio = tempfile.mkdtemp(prefix='turnero-carga-')
+atexit.register(shutil.rmtree, _directorio, ignore_errors=True)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_directorio, 'carga.db')}"
+# Todos los kioscos simulados salen de la misma IP: se mide la API, no los límites
+os.environ.setdefault('RATE_LIMIT_HABILITADO', '0')
+os.environ.setdefault('MAX_TURNOS_POR_CATEGORIA', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app import app, db, inicializar_base, motor_colas, Categoria, Turno, Usuario
+
+# Mezcla de operaciones por defecto (pesos relativos)
+MEZCLA = {
+    'kiosco': 40,
+    'panel_turnos': 25,
+    'panel_estadisticas': 15,
+    'llamar_siguiente': 12,
+    'iniciar_completar': 8,
+}
+
+# =============================================================================
+# DATOS DE PRUEBA
+# =============================================================================
+def sembrar(categorias, usuarios, dias, turnos_por_dia, semilla):
+    """Crea categorías, usuarios y el historial de turnos; devuelve los ids de categoría"""
+    aleatorio = random.Random(semilla)
+
+    inicializar_base()
+    extra = max(0, categorias - Categoria.query.count())
+    db.session.add_all([
+        Categoria(nombre=f'Categoria {i}', descripcion='Benchmark', tiempo_estimado=aleatorio.randint(5, 30))
+        for i in range(extra)
+    ])
+    hash_clave = generate_password_hash('bench')
+    db.session.add(Usuario(nombre='Admin', email='admin@bench', password_hash=hash_clave, es_admin=True))
+    db.session.add_all([
+        Usuario(nombre=f'Usuario {i}', email=f'usuario{i}@bench', password_hash=hash_clave)
+        for i in range(usuarios)
+    ])
+    db.session.commit()
+
+    categoria_ids = [c.id for c in Categoria.query.all()]
+    hoy = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    for dia in range(dias, 0, -1):
+        inicio_dia = hoy - timedelta(days=dia)
+        filas = []
+        for i in range(turnos_por_dia):
+            creado = inicio_dia + timedelta(seconds=aleatorio.randint(0, 9 * 3600))
+            inicio = creado + timedelta(minutes=aleatorio.randint(0, 40))
+            cancelado = aleatorio.random() < 0.1
+            filas.append({
+                'numero': i + 1,
+                'categoria_id': aleatorio.choice(categoria_ids),
+                'estado': 'cancelado' if cancelado else 'completado',
+                'fecha_creacion': creado,
+                'hora_estimada': creado + timedelta(minutes=15),
+                'hora_inicio': None if cancelado else inicio,
+                'hora_fin': None if cancelado else inicio + timedelta(minutes=aleatorio.randint(3, 25))
+            })
+        db.session.execute(Turno.__table__.insert(), filas)
+    db.session.commit()
+    return categoria_ids
+
+# =============================================================================
+# CONTEO DE CONSULTAS
+# =============================================================================
+_hilo = threading.local()
+
+def _contar_consulta(*args):
+    _hilo.consultas = getattr(_hilo, 'consultas', 0) + 1
+
+# =============================================================================
+# OPERACIONES
+# =============================================================================
+class Cliente:
+    """Un hilo de carga: cliente HTTP de prueba y estado de su puesto de atención"""
+
+    def __init__(self, token, categoria_ids, aleatorio):
+        self.http = app.test_client()
+        self.auth = {'Authorization': f'Bearer {token}'}
+        self.categoria_ids = categoria_ids
+        self.aleatorio = aleatorio
+        self.turno_en_atencion = None
+
+    def kiosco(self):
+        categoria_id = self.aleatorio.choice(self.categoria_ids)
+        return [('POST /api/turnos', lambda: self.http.post('/api/turnos', json={'categoria_id': categoria_id}))]
+
+    def panel_turnos(self):
+        return [('GET /api/turnos', lambda: self.http.get('/api/turnos?estado=esperando'))]
+
+    def panel_estadisticas(self):
+        return [('GET /api/estadisticas', lambda: self.http.get('/api/estadisticas', headers=self.auth))]
+
+    def llamar_siguiente(self):
+        def llamar():
+            cuerpo = {'categorias': self.categoria_ids}
+            if self.turno_en_atencion:
+                cuerpo['completar_turno_id'] = self.turno_en_atencion
+            respuesta = self.http.post('/api/llamar_siguiente', json=cuerpo, headers=self.auth)
+            turno = respuesta.get_json().get('turno') if respuesta.status_code == 200 else None
+            self.turno_en_atencion = turno['id'] if turno else None
+            return respuesta
+        return [('POST /api/llamar_siguiente', llamar)]
+
+    def iniciar_completar(self):
+        siguiente = motor_colas.siguiente(self.aleatorio.choice(self.categoria_ids))
+        if not siguiente:
+            return []
+        turno_id = siguiente[0]
+        return [
+            ('POST /api/iniciar_turno', lambda: self.http.post(f'/api/iniciar_turno/{turno_id}', headers=self.auth)),
+            ('POST /api/completar_turno', lambda: self.http.post(f'/api/completar_turno/{turno_id}', headers=self.auth)),
+        ]
+
+def ejecutar(cliente, operaciones, resultados, errores):
+    for operacion in operaciones:
+        for endpoint, request in getattr(cliente, operacion)():
+            _hilo.consultas = 0
+            inicio = time.perf_counter()
+            respuesta = request()
+            duracion = time.perf_counter() - inicio
+            resultados[endpoint].append((duracion, _hilo.consultas))
+            if respuesta.status_code >= 400:
+                errores[endpoint] += 1
+
+# =============================================================================
+# REPORTE
+# =============================================================================
+def percentil(valores_ordenados, p):
+    indice = max(0, int(round(p / 100 * len(valores_ordenados) + 0.5)) - 1)
+    return valores_ordenados[min(indice, len(valores_ordenados) - 1)]
+
+def resumir(resultados, errores, duracion_total):
+    resumen = {}
+    for endpoint, muestras in sorted(resultados.items()):
+        tiempos = sorted(d for d, _ in muestras)
+        resumen[endpoint] = {
+            'requests': len(muestras),
+            'errores': errores[endpoint],
+            'p50_ms': round(percentil(tiempos, 50) * 1000, 2),
+            'p95_ms': round(percentil(tiempos, 95) * 1000, 2),
+            'p99_ms': round(percentil(tiempos, 99) * 1000, 2),
+            'req_s': round(len(muestras) / duracion_total, 1),
+            'consultas_promedio': round(sum(c for _, c in muestras) / len(muestras), 2),
+        }
+    return resumen
+
+def imprimir(resumen, duracion_total):
+    print(f"{'endpoint':<28}{'req':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'SQL/req':>9}")
+    total = 0
+    for endpoint, r in resumen.items():
+        total += r['requests']
+        print(f"{endpoint:<28}{r['requests']:>7}{r['errores']:>5}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{r['p99_ms']:>9.2f}{r['req_s']:>9.1f}{r['consultas_promedio']:>9.2f}")
+    print(f'Total: {total} requests en {duracion_total:.2f} s ({total / duracion_total:.1f} req/s)')
+
+def comparar(resumen, archivo_base, tolerancia):
+    """Devuelve los endpoints cuyo p95 empeoró más que la tolerancia respecto de la base"""
+    with open(archivo_base) as archivo:
+        base = json.load(archivo)['endpoints']
+    regresiones = []
+    for endpoint, r in resumen.items():
+        anterior = base.get(endpoint)
+        if anterior and r['p95_ms'] > anterior['p95_ms'] * (1 + tolerancia):
+            regresiones.append(f"{endpoint}: p95 {anterior['p95_ms']} ms -> {r['p95_ms']} ms")
+    return regresiones
+
+# =============================================================================
+# PRINCIPAL
+# =============================================================================
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga de la API de turnos')
+    parser.add_argument('--categorias', type=int, default=6)
+    parser.add_argument('--usuarios', type=int, default=50)
+    parser.add_argument('--dias', type=int, default=90, help='días de historial a generar')
+    parser.add_argument('--turnos-por-dia', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=2000, help='operaciones totales de la mezcla')
+    parser.add_argument('--hilos', type=int, default=4)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--guardar', help='archivo JSON donde guardar el resultado')
+    parser.add_argument('--comparar', help='resultado JSON previo contra el cual comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='empeoramiento de p95 admitido')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f'Sembrando {args.dias} días x {args.turnos_por_dia} turnos en {_directorio} ...')
+        categoria_ids = sembrar(args.categorias, args.usuarios, args.dias, args.turnos_por_dia, args.semilla)
+        token = app.test_client().post(
+            '/api/auth/login', json={'email': 'admin@bench', 'password': 'bench'}
+        ).get_json()['access_token']
+
+    aleatorio = random.Random(args.semilla)
+    operaciones = aleatorio.choices(list(MEZCLA), weights=list(MEZCLA.values()), k=args.requests)
+    resultados = defaultdict(list)
+    errores = defaultdict(int)
+    hilos = [
+        threading.Thread(target=ejecutar, args=(
+            Cliente(token, categoria_ids, random.Random(args.semilla + i)),
+            operaciones[i::args.hilos], resultados, errores
+        ))
+        for i in range(args.hilos)
+    ]
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _contar_consulta)
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion_total = time.perf_counter() - inicio
+
+    resumen = resumir(resultados, errores, duracion_total)
+    imprimir(resumen, duracion_total)
+
+    if args.guardar:
+        with open(args.guardar, 'w') as archivo:
+            json.dump({'parametros': vars(args), 'endpoints': resumen}, archivo, indent=2)
+    if args.comparar:
+        regresiones = comparar(resumen, args.comparar, args.tolerancia)
+        for regresion in regresiones:
+            print(f'REGRESION {regresion}')
+        if regresiones:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
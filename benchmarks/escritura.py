@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# =============================================================================
+# SISTEMA DE TURNOS - BENCHMARK DE ESCRITURA AGRUPADA
+# =============================================================================
+"""
+Simula la ráfaga de kioscos que llega cuando baja un grupo de personas: muchos
+hilos emiten POST /api/turnos a la vez. Compara un commit por request con la
+escritura agrupada (TURNOS_ESCRITURA_AGRUPADA_MS) y reporta commits/s,
+turnos/s y latencias.
+
+La base por defecto es SQLite temporal; con BENCH_DATABASE_URL se puede medir
+contra otra, por ejemplo PostgreSQL (se crean tablas en ella: usar una base
+descartable).
+
+Uso: [BENCH_DATABASE_URL=postgresql://...] python benchmarks/escritura.py
+         [--kioscos 32] [--turnos 40] [--ventanas 0,2,5]
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# La base de prueba debe configurarse antes de importar la aplicación
+_directorio = tempfile.mkdtemp(prefix='turnero-bench-')
+atexit.register(shutil.rmtree, _directorio, ignore_errors=True)
+os.environ['DATABASE_URL'] = os.environ.get('BENCH_DATABASE_URL') or f"sqlite:///{os.path.join(_directorio, 'bench.db')}"
+os.environ.setdefault('RATE_LIMIT_HABILITADO', '0')
+os.environ.setdefault('MAX_TURNOS_POR_CATEGORIA', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import app, db, inicializar_base, cargar_estado, escritor_turnos, Turno
+
+# =============================================================================
+# MEDICION
+# =============================================================================
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+def rafaga(kioscos, turnos, ventana_ms):
+    """Cada kiosco emite `turnos` turnos seguidos; todos arrancan a la vez"""
+    app.config['TURNOS_ESCRITURA_AGRUPADA_MS'] = ventana_ms
+    escritor_turnos.ventana = ventana_ms / 1000
+
+    commits = [0]
+
+    def contar(conexion):
+        commits[0] += 1
+
+    latencias, errores = [], [0]
+    lock = threading.Lock()
+    largada = threading.Barrier(kioscos + 1)
+
+    def kiosco(indice):
+        cliente = app.test_client()
+        propias = []
+        largada.wait()
+        for i in range(turnos):
+            inicio = time.perf_counter()
+            respuesta = cliente.post('/api/turnos', json={'categoria_id': (indice + i) % 4 + 1})
+            propias.append(time.perf_counter() - inicio)
+            if respuesta.status_code != 201:
+                errores[0] += 1
+        with lock:
+            latencias.extend(propias)
+
+    hilos = [threading.Thread(target=kiosco, args=(i,)) for i in range(kioscos)]
+    for hilo in hilos:
+        hilo.start()
+    event.listen(db.engine, 'commit', contar)
+    largada.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    event.remove(db.engine, 'commit', contar)
+
+    total = kioscos * turnos
+    nombre = f'agrupada {ventana_ms:g} ms' if ventana_ms else 'commit por request'
+    print(f'{nombre:<22}{total / duracion:>10.0f}{commits[0] / duracion:>12.0f}{commits[0]:>9}'
+          f'{percentil(latencias, 50) * 1000:>10.1f}{percentil(latencias, 99) * 1000:>10.1f}{errores[0]:>6}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kioscos', type=int, default=32, help='hilos emitiendo turnos a la vez')
+    parser.add_argument('--turnos', type=int, default=40, help='turnos por kiosco')
+    parser.add_argument('--ventanas', default='0,2,5', help='ventanas en ms a comparar (0 = sin agrupar)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        inicializar_base()
+        cargar_estado()
+
+        print(f'{args.kioscos} kioscos x {args.turnos} turnos ({db.engine.url.get_backend_name()})')
+        print(f'{"modo":<22}{"turnos/s":>10}{"commits/s":>12}{"commits":>9}{"p50 ms":>10}{"p99 ms":>10}{"err":>6}')
+        for ventana in (float(v) for v in args.ventanas.split(',')):
+            rafaga(args.kioscos, args.turnos, ventana)
+
+        # Los números del día no se repiten dentro de cada categoría
+        repetidos = db.session.query(Turno.categoria_id, Turno.numero).group_by(
+            Turno.categoria_id, Turno.numero
+        ).having(db.func.count() > 1).count()
+        print(f'Números repetidos: {repetidos}')
+
+if __name__ == '__main__':
+    main()
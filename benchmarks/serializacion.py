@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# =============================================================================
+# SISTEMA DE TURNOS - BENCHMARK DE SERIALIZACION DE TURNOS
+# =============================================================================
+"""
+Compara el listado de turnos con objetos ORM y carga perezosa de la categoría
+(implementación anterior) contra la consulta por columnas con nombres de
+categoría cacheados que usa GET /api/turnos.
+
+Uso: python benchmarks/serializacion.py [--turnos 10000] [--repeticiones 5]
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# La base de prueba debe configurarse antes de importar la aplicación
+_directorio = tempfile.mkdtemp(prefix='turnero-bench-')
+atexit.register(shutil.rmtree, _directorio, ignore_errors=True)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_directorio, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import app, db, inicializar_base, Turno, COLUMNAS_TURNO, serializar_turnos
+
+# =============================================================================
+# DATOS DE PRUEBA
+# =============================================================================
+def sembrar(cantidad):
+    """Inserta `cantidad` turnos repartidos entre las categorías por defecto"""
+    estados = ['esperando', 'en_atencion', 'completado', 'cancelado']
+    base = datetime.now() - timedelta(hours=8)
+    filas = []
+    for i in range(cantidad):
+        creado = base + timedelta(seconds=i)
+        filas.append({
+            'numero': i + 1,
+            'categoria_id': i % 4 + 1,
+            'estado': estados[i % 4],
+            'fecha_creacion': creado,
+            'hora_estimada': creado + timedelta(minutes=15),
+            'hora_inicio': creado + timedelta(minutes=5) if i % 4 in (1, 2) else None,
+            'hora_fin': creado + timedelta(minutes=12) if i % 4 == 2 else None
+        })
+    db.session.execute(Turno.__table__.insert(), filas)
+    db.session.commit()
+
+# =============================================================================
+# IMPLEMENTACIONES A COMPARAR
+# =============================================================================
+def listado_orm():
+    """Implementación anterior: objetos ORM y t.categoria por fila"""
+    turnos = Turno.query.order_by(Turno.fecha_creacion).all()
+    return [{
+        'id': t.id,
+        'numero': t.numero,
+        'categoria_id': t.categoria_id,
+        'categoria': t.categoria.nombre,
+        'estado': t.estado,
+        'fecha_creacion': t.fecha_creacion.isoformat(),
+        'hora_estimada': t.hora_estimada.isoformat() if t.hora_estimada else None,
+        'hora_inicio': t.hora_inicio.isoformat() if t.hora_inicio else None,
+        'hora_fin': t.hora_fin.isoformat() if t.hora_fin else None
+    } for t in turnos]
+
+def listado_columnas():
+    """Implementación actual: consulta por columnas y nombres cacheados"""
+    filas = db.session.query(*COLUMNAS_TURNO).order_by(Turno.fecha_creacion).all()
+    return serializar_turnos(filas)
+
+# =============================================================================
+# MEDICION
+# =============================================================================
+def medir(nombre, funcion, repeticiones):
+    consultas = [0]
+
+    def contar(*args):
+        consultas[0] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', contar)
+    tiempos = []
+    try:
+        for _ in range(repeticiones):
+            # Sesión limpia en cada vuelta para no reutilizar objetos ya cargados
+            db.session.remove()
+            inicio = time.perf_counter()
+            app.json.dumps(funcion())
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', contar)
+
+    mejor = min(tiempos)
+    print(f'{nombre:<22} mejor {mejor * 1000:8.1f} ms   '
+          f'promedio {sum(tiempos) / len(tiempos) * 1000:8.1f} ms   '
+          f'consultas/listado {consultas[0] / repeticiones:6.1f}')
+    return mejor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--turnos', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        inicializar_base()
+        sembrar(args.turnos)
+        print(f'Listado de {args.turnos} turnos (incluye codificación JSON)')
+        anterior = medir('ORM + carga perezosa', listado_orm, args.repeticiones)
+        actual = medir('columnas + cache', listado_columnas, args.repeticiones)
+        print(f'Mejora: {anterior / actual:.1f}x')
+
+if __name__ == '__main__':
+    main()
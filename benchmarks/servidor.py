@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# =============================================================================
+# SISTEMA DE TURNOS - BENCHMARK HTTP DEL SERVIDOR
+# =============================================================================
+"""
+Genera carga HTTP real contra un servidor en ejecución (servidor de desarrollo
+o gunicorn) para comparar throughput y latencias de extremo a extremo.
+Usa conexiones keep-alive, una por hilo.
+
+Mezcla: GET /api/categorias, GET /api/turnos?estado=esperando, POST /api/turnos
+
+El servidor debe levantarse sin límites de tasa ni tope de cola, ya que toda
+la carga sale de una misma IP:
+
+    RATE_LIMIT_HABILITADO=0 MAX_TURNOS_POR_CATEGORIA=0 python run.py --produccion
+
+Uso: python benchmarks/servidor.py --url http://127.0.0.1:5000 [--hilos 16] [--segundos 10]
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+# (método, ruta, cuerpo, peso)
+MEZCLA = [
+    ('GET', '/api/categorias', None, 30),
+    ('GET', '/api/turnos?estado=esperando&limite=50', None, 40),
+    ('POST', '/api/turnos', {'categoria_id': 1}, 30),
+]
+
+# =============================================================================
+# CARGA
+# =============================================================================
+def trabajador(url, fin, latencias, errores, semilla):
+    destino = urlparse(url)
+    aleatorio = random.Random(semilla)
+    conexion = http.client.HTTPConnection(destino.hostname, destino.port or 80, timeout=30)
+    operaciones = [op[:3] for op in MEZCLA]
+    pesos = [op[3] for op in MEZCLA]
+
+    while time.perf_counter() < fin:
+        metodo, ruta, cuerpo = aleatorio.choices(operaciones, weights=pesos)[0]
+        inicio = time.perf_counter()
+        try:
+            if cuerpo is None:
+                conexion.request(metodo, ruta)
+            else:
+                conexion.request(metodo, ruta, body=json.dumps(cuerpo),
+                                 headers={'Content-Type': 'application/json'})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status >= 400:
+                errores.append(respuesta.status)
+        except (OSError, http.client.HTTPException):
+            errores.append('conexion')
+            conexion.close()
+            conexion = http.client.HTTPConnection(destino.hostname, destino.port or 80, timeout=30)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+    conexion.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTTP del servidor de turnos')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--segundos', type=float, default=10)
+    args = parser.parse_args()
+
+    latencias = []
+    errores = []
+    fin = time.perf_counter() + args.segundos
+    hilos = [
+        threading.Thread(target=trabajador, args=(args.url, fin, latencias, errores, i))
+        for i in range(args.hilos)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    if not latencias:
+        print(f'Sin respuestas exitosas ({len(errores)} errores)')
+        return
+
+    def percentil(p):
+        return latencias[min(len(latencias) - 1, int(p / 100 * len(latencias)))] * 1000
+
+    print(f'{len(latencias)} requests en {duracion:.1f} s con {args.hilos} hilos: '
+          f'{len(latencias) / duracion:.1f} req/s   '
+          f'p50 {percentil(50):.1f} ms   p95 {percentil(95):.1f} ms   p99 {percentil(99):.1f} ms   '
+          f'errores {len(errores)}')
+
+if __name__ == '__main__':
+    main()
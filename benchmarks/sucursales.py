@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# =============================================================================
+# SISTEMA DE TURNOS - BENCHMARK DE SUCURSALES
+# =============================================================================
+"""
+Mide el costo de los requests de una sucursal con la base compartida por una
+sola sucursal y después por muchas, con la misma cantidad de turnos en cada
+una. Con los índices que empiezan por sucursal_id y el catálogo y las colas
+separados por sucursal, los tiempos de la sucursal 1 no deberían cambiar.
+
+Uso: python benchmarks/sucursales.py [--sucursales 50] [--turnos 2000] [--repeticiones 50]
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# La base de prueba debe configurarse antes de importar la aplicación
+_directorio = tempfile.mkdtemp(prefix='turnero-bench-')
+atexit.register(shutil.rmtree, _directorio, ignore_errors=True)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_directorio, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import (
+    app, db, inicializar_base, sembrar_categorias, cargar_estado, calcular_estadisticas,
+    catalogo_categorias, Sucursal, Turno
+)
+
+# =============================================================================
+# DATOS DE PRUEBA
+# =============================================================================
+def sembrar_sucursal(sucursal_id, cantidad):
+    """Categorías por defecto y `cantidad` turnos de hoy en la sucursal"""
+    if sucursal_id != 1:
+        db.session.add(Sucursal(id=sucursal_id, nombre=f'Sucursal {sucursal_id}'))
+        db.session.commit()
+    sembrar_categorias(sucursal_id)
+    catalogo_categorias.invalidar(compartir=False)
+    categorias = sorted(catalogo_categorias.ids_sucursal(sucursal_id))
+    estados = ['esperando', 'en_atencion', 'completado', 'cancelado']
+    base = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    filas = []
+    for i in range(cantidad):
+        creado = base + timedelta(seconds=i * 5)
+        filas.append({
+            'numero': i // len(categorias) + 1,
+            'categoria_id': categorias[i % len(categorias)],
+            'sucursal_id': sucursal_id,
+            'estado': estados[i % 4],
+            'fecha_creacion': creado,
+            'hora_estimada': creado + timedelta(minutes=15),
+            'hora_inicio': creado + timedelta(minutes=5) if i % 4 in (1, 2) else None,
+            'hora_fin': creado + timedelta(minutes=12) if i % 4 == 2 else None
+        })
+    db.session.execute(Turno.__table__.insert(), filas)
+    db.session.commit()
+
+# =============================================================================
+# MEDICION
+# =============================================================================
+def medir(cliente, repeticiones):
+    """Mejor tiempo en ms de cada operación sobre la sucursal 1"""
+    hoy = datetime.now().date()
+    operaciones = {
+        'GET /api/categorias': lambda: cliente.get('/api/categorias?sucursal_id=1'),
+        'GET /api/turnos': lambda: cliente.get('/api/turnos?sucursal_id=1&estado=esperando'),
+        'GET /api/colas': lambda: cliente.get('/api/colas?sucursal_id=1'),
+        'estadísticas del día': lambda: calcular_estadisticas(hoy, 1),
+    }
+    resultados = {}
+    for nombre, operacion in operaciones.items():
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            operacion()
+            tiempos.append(time.perf_counter() - inicio)
+        resultados[nombre] = min(tiempos) * 1000
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sucursales', type=int, default=50)
+    parser.add_argument('--turnos', type=int, default=2000, help='turnos por sucursal')
+    parser.add_argument('--repeticiones', type=int, default=50)
+    args = parser.parse_args()
+
+    cliente = app.test_client()
+    with app.app_context():
+        inicializar_base()
+        sembrar_sucursal(1, args.turnos)
+        cargar_estado()
+        una = medir(cliente, args.repeticiones)
+
+        for sucursal_id in range(2, args.sucursales + 1):
+            sembrar_sucursal(sucursal_id, args.turnos)
+        cargar_estado()
+        muchas = medir(cliente, args.repeticiones)
+
+    print(f'Sucursal 1 con {args.turnos} turnos; mejor tiempo en ms')
+    print(f'{"operación":<24}{"1 sucursal":>12}{f"{args.sucursales} sucursales":>16}')
+    for nombre in una:
+        print(f'{nombre:<24}{una[nombre]:>12.2f}{muchas[nombre]:>16.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# =============================================================================
+# SISTEMA DE TURNOS - CACHE EN MEMORIA
+# =============================================================================
+"""
+Caches en memoria para datos que se consultan mucho más de lo que cambian:
+con vencimiento por tiempo (CacheTTL) o por cantidad de entradas (CacheLRU).
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import threading
+import time
+from collections import OrderedDict
+
+# =============================================================================
+# CACHE CON VENCIMIENTO
+# =============================================================================
+class CacheTTL:
+    """Valores calculados por clave, válidos durante `ttl` segundos o hasta invalidar()"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._valores = {}  # clave -> (vence, valor)
+        self._lock = threading.Lock()
+        self._generacion = 0
+
+    def obtener(self, clave, calcular):
+        """Devuelve el valor cacheado o lo calcula con calcular()"""
+        ahora = time.monotonic()
+        entrada = self._valores.get(clave)
+        if entrada is not None and entrada[0] > ahora:
+            return entrada[1]
+
+        generacion = self._generacion
+        valor = calcular()
+        with self._lock:
+            # Si se invalidó mientras se calculaba, el valor ya puede estar viejo
+            if generacion == self._generacion:
+                self._valores[clave] = (ahora + self.ttl, valor)
+        return valor
+
+    def invalidar(self):
+        """Descarta todos los valores cacheados"""
+        with self._lock:
+            self._generacion += 1
+            self._valores.clear()
+
+
+# =============================================================================
+# CACHE LRU
+# =============================================================================
+class CacheLRU:
+    """Hasta `capacidad` valores por clave; descarta el menos usado recientemente"""
+
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self._valores = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+
+    def obtener(self, clave, calcular):
+        """Devuelve el valor cacheado o lo calcula con calcular() (None no se cachea)"""
+        with self._lock:
+            if clave in self._valores:
+                self._valores.move_to_end(clave)
+                return self._valores[clave]
+            generacion = self._generacion
+
+        valor = calcular()
+        if valor is None:
+            return valor
+        with self._lock:
+            # Si se descartó algo mientras se calculaba, el valor ya puede estar viejo
+            if generacion == self._generacion:
+                self._valores[clave] = valor
+                self._valores.move_to_end(clave)
+                while len(self._valores) > self.capacidad:
+                    self._valores.popitem(last=False)
+        return valor
+
+    def descartar(self, clave):
+        with self._lock:
+            self._generacion += 1
+            self._valores.pop(clave, None)
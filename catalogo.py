@@ -0,0 +1,145 @@
+# =============================================================================
+# SISTEMA DE TURNOS - CATALOGO DE CATEGORIAS EN MEMORIA
+# =============================================================================
+"""
+Cache en proceso del catálogo de categorías.
+Las categorías cambian muy poco, así que se cargan una vez y se sirven desde
+memoria (incluido el JSON ya codificado, también separado por sucursal) hasta
+que se invalidan por una escritura, vence el TTL o cambia la versión
+compartida entre procesos.
+
+La versión compartida es un archivo con un contador: cada proceso que escribe
+categorías lo incrementa y los demás detectan el cambio con un stat().
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import hashlib
+import json
+import os
+import threading
+import time
+
+# =============================================================================
+# CATALOGO
+# =============================================================================
+class CatalogoCategorias:
+    """Categorías indexadas por id con su JSON y ETag precalculados"""
+
+    def __init__(self, cargar, ttl=300, archivo_version=None):
+        self._cargar = cargar  # función que devuelve la lista de categorías como dicts
+        self.ttl = ttl
+        self.archivo_version = archivo_version
+        self._lock = threading.Lock()
+        self._datos = None
+        self._vence = 0
+        self._marca_version = None
+
+    # =========================================================================
+    # CONSULTAS
+    # =========================================================================
+    def obtener(self, categoria_id):
+        """Categoría como dict, o None si no existe"""
+        return self._vigentes()['por_id'].get(categoria_id)
+
+    def nombres(self):
+        """Diccionario id -> nombre de todas las categorías"""
+        return self._vigentes()['nombres']
+
+    def etag_nombres(self):
+        """Hash de los nombres de todas las categorías: cambia al renombrar una"""
+        return self._vigentes()['etag_nombres']
+
+    def activas_json(self, sucursal_id=None):
+        """(JSON codificado, ETag) de las categorías activas, de todas o de una sucursal"""
+        activas = self._vigentes()['activas_json']
+        return activas.get(sucursal_id) or activas['vacio']
+
+    def ids_sucursal(self, sucursal_id):
+        """Ids de todas las categorías de la sucursal (conjunto vacío si no tiene)"""
+        return self._vigentes()['ids_sucursal'].get(sucursal_id, frozenset())
+
+    def activas_sucursal(self, sucursal_id):
+        """Ids de las categorías activas de la sucursal, en orden"""
+        return self._vigentes()['activas_sucursal'].get(sucursal_id, ())
+
+    def categoria_json(self, categoria_id):
+        """(JSON codificado, ETag) de una categoría, o None si no existe"""
+        return self._vigentes()['json_por_id'].get(categoria_id)
+
+    # =========================================================================
+    # INVALIDACION
+    # =========================================================================
+    def invalidar(self, compartir=True):
+        """Descarta el catálogo local y, si compartir, avisa a los demás procesos"""
+        with self._lock:
+            self._datos = None
+        if compartir and self.archivo_version:
+            self._incrementar_version()
+
+    def _incrementar_version(self):
+        try:
+            with open(self.archivo_version) as archivo:
+                version = int(archivo.read().strip() or 0)
+        except (OSError, ValueError):
+            version = 0
+        temporal = f'{self.archivo_version}.{os.getpid()}'
+        with open(temporal, 'w') as archivo:
+            archivo.write(str(version + 1))
+        os.replace(temporal, self.archivo_version)
+
+    def _marca_actual(self):
+        if not self.archivo_version:
+            return None
+        try:
+            estado = os.stat(self.archivo_version)
+            return estado.st_mtime_ns, estado.st_ino
+        except OSError:
+            return None
+
+    # =========================================================================
+    # CARGA
+    # =========================================================================
+    def _vigentes(self):
+        datos = self._datos
+        if datos is not None and time.monotonic() < self._vence and self._marca_actual() == self._marca_version:
+            return datos
+
+        with self._lock:
+            marca = self._marca_actual()
+            categorias = self._cargar()
+            self._datos = self._indexar(categorias)
+            self._vence = time.monotonic() + self.ttl
+            self._marca_version = marca
+            return self._datos
+
+    @staticmethod
+    def _indexar(categorias):
+        def codificar(valor):
+            contenido = json.dumps(valor, separators=(',', ':')).encode()
+            return contenido, hashlib.md5(contenido).hexdigest()
+
+        # Listados por sucursal precalculados: servir una sucursal no depende de cuántas hay
+        activas = {None: []}
+        ids_sucursal = {}
+        for c in categorias:
+            ids_sucursal.setdefault(c['sucursal_id'], set()).add(c['id'])
+            if c['activa']:
+                resumen = {k: c[k] for k in ('id', 'nombre', 'descripcion', 'tiempo_estimado', 'sucursal_id')}
+                activas[None].append(resumen)
+                activas.setdefault(c['sucursal_id'], []).append(resumen)
+        activas_json = {clave: codificar(lista) for clave, lista in activas.items()}
+        activas_json['vacio'] = codificar([])
+        nombres = {c['id']: c['nombre'] for c in categorias}
+        return {
+            'por_id': {c['id']: c for c in categorias},
+            'nombres': nombres,
+            'etag_nombres': codificar(sorted(nombres.items()))[1],
+            'json_por_id': {c['id']: codificar(c) for c in categorias},
+            'activas_json': activas_json,
+            'ids_sucursal': {clave: frozenset(ids) for clave, ids in ids_sucursal.items()},
+            'activas_sucursal': {
+                clave: tuple(c['id'] for c in lista) for clave, lista in activas.items() if clave is not None
+            }
+        }
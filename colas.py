@@ -0,0 +1,154 @@
+# =============================================================================
+# SISTEMA DE TURNOS - MOTOR DE COLAS EN MEMORIA
+# =============================================================================
+"""
+Estado en memoria de las colas de atención por categoría. Cada categoría
+pertenece a una sucursal, así que las colas de una sucursal se consultan
+recorriendo solo sus categorías.
+Se reconstruye desde la base de datos al iniciar y los endpoints que cambian
+el estado de un turno lo mantienen actualizado, de modo que cantidades en
+espera, posiciones y "próximo turno" se responden sin consultar la base.
+
+Los turnos reservados para más tarde (importados con su hora) esperan fuera
+de la cola hasta esa hora; liberar() los encola cuando llega.
+
+El estado es por proceso: en despliegues con varios procesos cada uno tiene
+su propia copia, por lo que conviene un único proceso con varios hilos.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+
+# =============================================================================
+# MOTOR DE COLAS
+# =============================================================================
+class MotorColas:
+    """Turnos en espera y en atención por categoría, en orden de llegada"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._esperando = {}    # categoria_id -> OrderedDict(turno_id -> numero)
+        self._en_atencion = {}  # categoria_id -> OrderedDict(turno_id -> numero)
+        self._categoria_de = {}  # turno_id -> categoria_id
+        self._reservas = []      # heap de (hora, turno_id, categoria_id, numero) que todavía no entran
+        self._reservados = {}    # turno_id -> hora de su entrada vigente en _reservas
+
+    def reconstruir(self, turnos):
+        """Carga el estado desde filas (id, categoria_id, numero, estado, desde) en orden de llegada"""
+        with self._lock:
+            self._esperando.clear()
+            self._en_atencion.clear()
+            self._categoria_de.clear()
+            self._reservas.clear()
+            self._reservados.clear()
+            for turno_id, categoria_id, numero, estado, desde in turnos:
+                self.actualizar(turno_id, categoria_id, numero, estado, desde)
+
+    def actualizar(self, turno_id, categoria_id, numero, estado, desde=None):
+        """
+        Aplica el nuevo estado de un turno. Un turno en espera con `desde` posterior
+        a ahora queda reservado hasta esa hora. Devuelve la categoría en la que estaba (o None).
+        """
+        with self._lock:
+            anterior = self._quitar(turno_id)
+            if estado == 'esperando' and desde is not None and desde > datetime.now():
+                heapq.heappush(self._reservas, (desde, turno_id, categoria_id, numero))
+                self._reservados[turno_id] = desde
+                self._categoria_de[turno_id] = categoria_id
+                return anterior
+            if estado == 'esperando':
+                destino = self._esperando
+            elif estado == 'en_atencion':
+                destino = self._en_atencion
+            else:
+                return anterior
+            cola = destino.setdefault(categoria_id, OrderedDict())
+            ultimo = next(reversed(cola), None)
+            cola[turno_id] = numero
+            self._categoria_de[turno_id] = categoria_id
+            if ultimo is not None and turno_id < ultimo:
+                # Turno que llega de otra categoría: conserva su lugar por orden de llegada
+                destino[categoria_id] = OrderedDict(sorted(cola.items()))
+            return anterior
+
+    def liberar(self, ahora=None):
+        """Encola las reservas cuya hora llegó; devuelve las categorías que cambiaron"""
+        ahora = ahora or datetime.now()
+        categorias = set()
+        with self._lock:
+            while self._reservas and self._reservas[0][0] <= ahora:
+                desde, turno_id, categoria_id, numero = heapq.heappop(self._reservas)
+                # Entradas de reservas que después cambiaron de estado u hora se descartan
+                if self._reservados.get(turno_id) == desde:
+                    self.actualizar(turno_id, categoria_id, numero, 'esperando')
+                    categorias.add(categoria_id)
+        return categorias
+
+    def _quitar(self, turno_id):
+        categoria_id = self._categoria_de.pop(turno_id, None)
+        if categoria_id is None:
+            return None
+        self._reservados.pop(turno_id, None)
+        self._esperando.get(categoria_id, {}).pop(turno_id, None)
+        self._en_atencion.get(categoria_id, {}).pop(turno_id, None)
+        return categoria_id
+
+    # =========================================================================
+    # CONSULTAS
+    # =========================================================================
+    def cantidad_esperando(self, categoria_id):
+        return len(self._esperando.get(categoria_id, ()))
+
+    def cantidad_en_atencion(self, categoria_id):
+        return len(self._en_atencion.get(categoria_id, ()))
+
+    def siguiente(self, categoria_id):
+        """Próximo turno a atender como (turno_id, numero), o None si no hay"""
+        with self._lock:
+            cola = self._esperando.get(categoria_id)
+            if not cola:
+                return None
+            return next(iter(cola.items()))
+
+    def esperando(self, categoria_id, limite=None):
+        """Turnos en espera de la categoría como lista de (turno_id, numero), en orden (los primeros `limite`)"""
+        with self._lock:
+            return list(islice(self._esperando.get(categoria_id, {}).items(), limite))
+
+    def en_atencion(self, categoria_id):
+        """Turnos en atención de la categoría como lista de (turno_id, numero)"""
+        with self._lock:
+            return list(self._en_atencion.get(categoria_id, {}).items())
+
+    def posicion(self, turno_id):
+        """Posición (1 = próximo) de un turno en espera, o None si no está esperando"""
+        with self._lock:
+            categoria_id = self._categoria_de.get(turno_id)
+            cola = self._esperando.get(categoria_id)
+            if not cola or turno_id not in cola:
+                return None
+            for posicion, actual in enumerate(cola, start=1):
+                if actual == turno_id:
+                    return posicion
+
+    def resumen(self, categorias=None):
+        """Estado de las categorías con turnos activos (todas o solo las de `categorias`)"""
+        with self._lock:
+            activas = set(self._esperando) | set(self._en_atencion)
+            if categorias is not None:
+                # Recorrer solo las categorías pedidas (las de una sucursal)
+                activas = {c for c in categorias if c in self._esperando or c in self._en_atencion}
+            return {
+                categoria_id: {
+                    'esperando': self.cantidad_esperando(categoria_id),
+                    'en_atencion': self.cantidad_en_atencion(categoria_id),
+                    'siguiente': self.siguiente(categoria_id)
+                }
+                for categoria_id in activas
+            }
@@ -5,6 +5,48 @@
 import os
 from datetime import timedelta
 
+# =============================================================================
+# LECTURA DE VARIABLES DE ENTORNO
+# =============================================================================
+def _entero(nombre, defecto):
+    return int(os.environ.get(nombre, defecto))
+
+def _decimal(nombre, defecto):
+    return float(os.environ.get(nombre, defecto))
+
+def _booleano(nombre, defecto=False):
+    valor = os.environ.get(nombre)
+    return defecto if valor is None else valor.lower() in ('1', 'true', 'si')
+
+# =============================================================================
+# MOTOR DE BASE DE DATOS
+# =============================================================================
+def _url_base_datos():
+    url = os.environ.get('DATABASE_URL') or 'sqlite:///turnero.db'
+    # Heroku/Render entregan postgres://, que SQLAlchemy ya no acepta
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def opciones_engine(url):
+    """Opciones de create_engine según el motor: pool para servidores, nada extra para SQLite en memoria"""
+    if url.startswith('sqlite'):
+        if ':memory:' in url or url in ('sqlite://', 'sqlite:///'):
+            return {}
+        # SQLite en archivo: las pragmas se aplican por conexión (ver SQLITE_PRAGMAS)
+        return {
+            'pool_size': _entero('DB_POOL_SIZE', 10),
+            'max_overflow': _entero('DB_MAX_OVERFLOW', 20),
+            'pool_timeout': _entero('DB_POOL_TIMEOUT', 30),
+        }
+    return {
+        'pool_size': _entero('DB_POOL_SIZE', 10),
+        'max_overflow': _entero('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': _entero('DB_POOL_TIMEOUT', 30),
+        'pool_pre_ping': _booleano('DB_POOL_PRE_PING', True),
+        'pool_recycle': _entero('DB_POOL_RECYCLE', 1800),
+    }
+
 # =============================================================================
 # CONFIGURACION BASE
 # =============================================================================
@@ -19,8 +61,54 @@ class Config:
     # =============================================================================
     # CONFIGURACION DE BASE DE DATOS
     # =============================================================================
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///turnero.db'
+    SQLALCHEMY_DATABASE_URI = _url_base_datos()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_engine(SQLALCHEMY_DATABASE_URI)
+    
+    # Pragmas aplicadas a cada conexión SQLite: WAL permite leer mientras otro
+    # proceso escribe, busy_timeout espera el lock en lugar de fallar con
+    # "database is locked" y synchronous=NORMAL evita un fsync por commit en WAL
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'busy_timeout': _entero('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': _entero('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size': _entero('SQLITE_CACHE_SIZE', -20000),  # negativo = KiB
+        'temp_store': 'MEMORY',
+    }
+    
+    # Crear tablas, migrar y sembrar categorías en el primer request de cada proceso.
+    # Deshabilitarlo en serverless y ejecutar `flask --app app init-db` al desplegar
+    AUTO_INICIALIZAR_DB = _booleano('AUTO_INICIALIZAR_DB', True)
+    
+    # =============================================================================
+    # CONFIGURACION DE JWT
+    # =============================================================================
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'cambiar-en-produccion'
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+    
+    # =============================================================================
+    # CONFIGURACION DE LIMITES DE TASA
+    # =============================================================================
+    # Cubetas de fichas para los endpoints públicos: ráfaga admitida y recarga por minuto
+    # (una ráfaga o recarga 0 desactiva la cubeta).
+    # RATE_LIMIT_BACKEND: 'memoria' (por proceso) o redis://... (compartido, pip install redis)
+    RATE_LIMIT_HABILITADO = _booleano('RATE_LIMIT_HABILITADO', True)
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memoria')
+    # Límite por IP holgado para los clientes sin clave de kiosco: los kioscos de una oficina
+    # comparten la IP pública y, sin PROXY_SALTOS, detrás del router de la plataforma todos los
+    # clientes tienen la misma. Los kioscos con clave en KIOSCO_CLAVES no lo usan (ver README)
+    LIMITE_TURNOS_IP = (_entero('LIMITE_TURNOS_IP_RAFAGA', 60), _entero('LIMITE_TURNOS_IP_POR_MINUTO', 60))
+    LIMITE_TURNOS_KIOSCO = (_entero('LIMITE_TURNOS_KIOSCO_RAFAGA', 30), _entero('LIMITE_TURNOS_KIOSCO_POR_MINUTO', 120))
+    LIMITE_LOGIN_IP = (_entero('LIMITE_LOGIN_IP_RAFAGA', 10), _entero('LIMITE_LOGIN_IP_POR_MINUTO', 20))
+    LIMITE_LOGIN_EMAIL = (_entero('LIMITE_LOGIN_EMAIL_RAFAGA', 5), _entero('LIMITE_LOGIN_EMAIL_POR_MINUTO', 5))
+    
+    # Claves de los kioscos (header X-Kiosco-Key, separadas por comas); una clave
+    # desconocida se trata como cualquier otro cliente y se limita por IP
+    KIOSCO_CLAVES = frozenset(c.strip() for c in os.environ.get('KIOSCO_CLAVES', '').split(',') if c.strip())
+    
+    # Proxies delante de la aplicación (X-Forwarded-For) para obtener la IP real
+    PROXY_SALTOS = _entero('PROXY_SALTOS', 0)
     
     # =============================================================================
     # CONFIGURACION DE SESION
@@ -38,7 +126,66 @@ class Config:
     # CONFIGURACION DE TURNOS
     # =============================================================================
     TIEMPO_ESTIMADO_DEFAULT = 15  # minutos
-    MAX_TURNOS_POR_CATEGORIA = 100
+    # Turnos en espera admitidos por categoría antes de rechazar nuevos (0 = sin límite)
+    MAX_TURNOS_POR_CATEGORIA = _entero('MAX_TURNOS_POR_CATEGORIA', 100)
+    
+    # Numeración: cantidad de números que cada proceso reserva por vez.
+    # 1 = sin reserva (sin huecos); >1 reduce la contención a costa de posibles huecos
+    TURNOS_BLOQUE_NUMEROS = _entero('TURNOS_BLOQUE_NUMEROS', 1)
+    
+    # Escritura agrupada de POST /api/turnos: milisegundos durante los que se juntan
+    # los turnos de requests concurrentes en una sola transacción (0 = un commit por
+    # request), máximo de turnos por transacción y segundos que espera cada request
+    TURNOS_ESCRITURA_AGRUPADA_MS = _decimal('TURNOS_ESCRITURA_AGRUPADA_MS', 0)
+    TURNOS_ESCRITURA_LOTE_MAX = _entero('TURNOS_ESCRITURA_LOTE_MAX', 200)
+    TURNOS_ESCRITURA_TIMEOUT = _decimal('TURNOS_ESCRITURA_TIMEOUT', 10)
+    
+    # Estimador de espera: peso de cada atención nueva en la media del tiempo de
+    # atención y segundos sin actividad tras los cuales un operador deja de contarse
+    ESTIMADOR_ALFA = _decimal('ESTIMADOR_ALFA', 0.2)
+    ESTIMADOR_VENTANA_OPERADORES = _entero('ESTIMADOR_VENTANA_OPERADORES', 900)
+    # Atenciones más cortas que esto (ausentes cerrados en el acto) no entran en la media
+    ESTIMADOR_MINIMO_SEGUNDOS = _entero('ESTIMADOR_MINIMO_SEGUNDOS', 10)
+    
+    # Números en espera que muestra GET /api/pantalla por categoría
+    PANTALLA_PROXIMOS = _entero('PANTALLA_PROXIMOS', 5)
+    
+    # Paginación de GET /api/turnos
+    TURNOS_LIMITE_PAGINA = _entero('TURNOS_LIMITE_PAGINA', 500)
+    TURNOS_LIMITE_PAGINA_MAX = _entero('TURNOS_LIMITE_PAGINA_MAX', 5000)
+    
+    # Máximo de turnos por operación masiva (POST /api/turnos/lote e importar)
+    TURNOS_LOTE_MAX = _entero('TURNOS_LOTE_MAX', 5000)
+    
+    # Archivo (flask --app app archivar): días cerrados que quedan en la tabla de
+    # turnos además del actual y turnos movidos a turno_historico por transacción
+    ARCHIVO_DIAS_EN_VIVO = _entero('ARCHIVO_DIAS_EN_VIVO', 0)
+    ARCHIVO_LOTE = _entero('ARCHIVO_LOTE', 1000)
+    
+    # =============================================================================
+    # CONFIGURACION DE CACHES
+    # =============================================================================
+    # Segundos que se reutilizan las estadísticas del día si no hubo cambios de turnos
+    ESTADISTICAS_CACHE_TTL = _decimal('ESTADISTICAS_CACHE_TTL', 10)
+    
+    # Catálogo de categorías en memoria: vencimiento, archivo de versión compartido
+    # entre procesos (opcional) y max-age de Cache-Control para kioscos/navegadores
+    CATEGORIAS_CACHE_TTL = _decimal('CATEGORIAS_CACHE_TTL', 300)
+    CATEGORIAS_VERSION_ARCHIVO = os.environ.get('CATEGORIAS_VERSION_ARCHIVO')
+    CATEGORIAS_MAX_AGE = _entero('CATEGORIAS_MAX_AGE', 60)
+    
+    # Cantidad de usuarios que se mantienen en memoria para no leerlos en cada request
+    USUARIOS_CACHE_TAMANO = _entero('USUARIOS_CACHE_TAMANO', 1024)
+    
+    # Eventos de turnos que se conservan para reanudar streams (Last-Event-ID)
+    EVENTOS_BUFFER = _entero('EVENTOS_BUFFER', 1000)
+    
+    # =============================================================================
+    # CONFIGURACION DE METRICAS
+    # =============================================================================
+    # Deshabilitadas no agregan costo; SQL_LENTA_MS es el umbral del log de consultas lentas
+    METRICAS_HABILITADAS = _booleano('METRICAS_HABILITADAS')
+    SQL_LENTA_MS = _decimal('SQL_LENTA_MS', 200)
     
     # =============================================================================
     # CONFIGURACION DE NOTIFICACIONES
@@ -75,6 +222,7 @@ class TestingConfig(Config):
     TESTING = True
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_engine(SQLALCHEMY_DATABASE_URI)
     WTF_CSRF_ENABLED = False
 
 # =============================================================================
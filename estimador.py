@@ -0,0 +1,91 @@
+# =============================================================================
+# SISTEMA DE TURNOS - ESTIMADOR DE TIEMPOS DE ESPERA
+# =============================================================================
+"""
+Estimación de la espera a partir de lo que efectivamente está pasando:
+media móvil exponencial del tiempo de atención (hora_fin - hora_inicio) por
+categoría y cantidad de operadores que atendieron la categoría recientemente.
+
+Cada atención completada y cada acción de un operador se registran en O(1);
+la espera de un turno con `adelante` turnos antes es
+adelante * tiempo de atención / operadores, así que recalcular la cola
+completa es un recorrido en memoria sin consultar la base.
+
+Como el motor de colas, el estado es por proceso.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import threading
+import time
+
+# =============================================================================
+# ESTIMADOR
+# =============================================================================
+class EstimadorEspera:
+    """Tiempo de atención (EWMA) y operadores activos por categoría"""
+
+    # Muestras necesarias antes de recortar atenciones atípicas contra la media
+    MUESTRAS_PARA_RECORTAR = 5
+
+    def __init__(self, alfa=0.2, ventana_operadores=900, minimo_segundos=10):
+        self.alfa = alfa  # peso de cada atención nueva en la media
+        self.ventana_operadores = ventana_operadores  # segundos sin actividad para dejar de contar un operador
+        self.minimo_segundos = minimo_segundos  # atenciones más cortas (ausentes) no cuentan
+        self._lock = threading.Lock()
+        self._atencion = {}    # categoria_id -> segundos (media móvil exponencial)
+        self._muestras = {}    # categoria_id -> atenciones incorporadas a la media
+        self._operadores = {}  # categoria_id -> {operador_id: última actividad (monotonic)}
+
+    # =========================================================================
+    # REGISTRO
+    # =========================================================================
+    def registrar_atencion(self, categoria_id, segundos):
+        """Incorpora la duración de una atención completada"""
+        # Un turno cerrado en el acto (ausente) no es una atención real
+        if segundos < self.minimo_segundos:
+            return
+        with self._lock:
+            media = self._atencion.get(categoria_id)
+            muestras = self._muestras.get(categoria_id, 0)
+            if media is None:
+                self._atencion[categoria_id] = float(segundos)
+            else:
+                # Un turno que quedó abierto por olvido no debe arrastrar la media; con
+                # pocas muestras la media todavía no sirve de referencia para recortar
+                if muestras >= self.MUESTRAS_PARA_RECORTAR:
+                    segundos = min(segundos, media * 4)
+                self._atencion[categoria_id] = media + self.alfa * (segundos - media)
+            self._muestras[categoria_id] = muestras + 1
+
+    def registrar_operador(self, categoria_id, operador_id):
+        """Marca al operador como activo en la categoría"""
+        with self._lock:
+            self._operadores.setdefault(categoria_id, {})[operador_id] = time.monotonic()
+
+    # =========================================================================
+    # CONSULTAS
+    # =========================================================================
+    def tiempo_atencion(self, categoria_id, por_defecto):
+        """Segundos de atención estimados (por_defecto mientras no haya datos)"""
+        return self._atencion.get(categoria_id, por_defecto)
+
+    def operadores(self, categoria_id, ocupados=0):
+        """Operadores activos en la categoría; al menos `ocupados` (turnos en atención) y 1"""
+        limite = time.monotonic() - self.ventana_operadores
+        with self._lock:
+            activos = self._operadores.get(categoria_id)
+            if activos:
+                for operador_id in [o for o, instante in activos.items() if instante < limite]:
+                    del activos[operador_id]
+            return max(1, ocupados, len(activos or ()))
+
+    def segundos_espera(self, categoria_id, adelante, por_defecto, ocupados=0):
+        """Espera estimada de un turno con `adelante` turnos antes en la cola"""
+        return adelante * self.tiempo_atencion(categoria_id, por_defecto) / self.operadores(categoria_id, ocupados)
+
+    def estimar_cola(self, categoria_id, turnos, por_defecto, ocupados=0):
+        """Segundos de espera de cada turno de una cola ordenada: lista de (turno, segundos)"""
+        paso = self.tiempo_atencion(categoria_id, por_defecto) / self.operadores(categoria_id, ocupados)
+        return [(turno, adelante * paso) for adelante, turno in enumerate(turnos)]
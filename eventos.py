@@ -0,0 +1,100 @@
+# =============================================================================
+# SISTEMA DE TURNOS - BUS DE EVENTOS
+# =============================================================================
+"""
+Bus de eventos en memoria para notificar cambios de turnos.
+Los endpoints que modifican turnos publican eventos y los clientes suscritos
+(panel de administración, pantallas de sala) los reciben vía Server-Sent Events.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import json
+import threading
+import time
+from collections import deque
+
+# =============================================================================
+# BUS DE EVENTOS
+# =============================================================================
+class BusEventos:
+    """Buffer circular de eventos con ids crecientes y espera bloqueante"""
+
+    def __init__(self, capacidad=1000):
+        self._eventos = deque(maxlen=capacidad)
+        self._condicion = threading.Condition()
+        # Los ids parten del reloj para que, tras un reinicio, un Last-Event-ID
+        # de la ejecución anterior quede fuera del buffer y provoque un reset
+        self._ultimo_id = int(time.time() * 1000)
+
+    def redimensionar(self, capacidad):
+        """Cambia la cantidad de eventos conservados (descarta los más viejos)"""
+        with self._condicion:
+            if capacidad != self._eventos.maxlen:
+                self._eventos = deque(self._eventos, maxlen=capacidad)
+
+    @property
+    def ultimo_id(self):
+        return self._ultimo_id
+
+    def publicar(self, tipo, datos):
+        """Registra un evento y despierta a los suscriptores. Devuelve su id"""
+        payload = json.dumps(datos, separators=(',', ':'))
+        with self._condicion:
+            self._ultimo_id += 1
+            self._eventos.append((self._ultimo_id, tipo, payload))
+            self._condicion.notify_all()
+            return self._ultimo_id
+
+    def eventos_desde(self, ultimo_id):
+        """
+        Eventos posteriores a ultimo_id.
+        Devuelve None si ya no están en el buffer (el cliente debe recargar).
+        """
+        with self._condicion:
+            return self._eventos_desde(ultimo_id)
+
+    def esperar(self, ultimo_id, timeout):
+        """Bloquea hasta que haya eventos posteriores a ultimo_id o venza el timeout"""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._ultimo_id != ultimo_id, timeout)
+            return self._eventos_desde(ultimo_id)
+
+    def _eventos_desde(self, ultimo_id):
+        if ultimo_id == self._ultimo_id:
+            return []
+        if ultimo_id > self._ultimo_id:
+            return None
+        if not self._eventos or self._eventos[0][0] > ultimo_id + 1:
+            return None
+        # Los ids son consecutivos: el primer evento pendiente está en un offset fijo
+        inicio = ultimo_id + 1 - self._eventos[0][0]
+        return [self._eventos[i] for i in range(inicio, len(self._eventos))]
+
+
+# =============================================================================
+# FORMATO SERVER-SENT EVENTS
+# =============================================================================
+def flujo_sse(bus, ultimo_id=None, keepalive=15):
+    """Generador de mensajes SSE a partir de ultimo_id (o desde ahora)"""
+    if ultimo_id is None:
+        ultimo_id = bus.ultimo_id
+
+    yield 'retry: 3000\n\n'
+    while True:
+        eventos = bus.esperar(ultimo_id, keepalive)
+
+        if eventos is None:
+            # Se perdieron eventos: el cliente debe volver a pedir el listado completo
+            ultimo_id = bus.ultimo_id
+            yield f'id: {ultimo_id}\nevent: reset\ndata: {{}}\n\n'
+            continue
+
+        if not eventos:
+            yield ': ping\n\n'
+            continue
+
+        for evento_id, tipo, payload in eventos:
+            yield f'id: {evento_id}\nevent: {tipo}\ndata: {payload}\n\n'
+            ultimo_id = evento_id
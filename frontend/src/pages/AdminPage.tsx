@@ -3,12 +3,15 @@ import { useEffect, useState } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { useAuth } from '../context/AuthContext';
 import { useNavigate } from 'react-router-dom';
-import { turnosAPI, estadisticasAPI, Turno, Estadisticas } from '../services/api';
+import { turnosAPI, estadisticasAPI, eventosAPI, Turno, Estadisticas } from '../services/api';
 import { TurnoManager } from '../components/admin/TurnoManager';
 import { Estadisticas as EstadisticasComponent } from '../components/admin/Estadisticas';
 import { Loading } from '../components/common/Loading';
 import toast from 'react-hot-toast';
 
+// Mínimo entre recargas de estadísticas disparadas por eventos del stream
+const ESTADISTICAS_INTERVALO_MS = 10000;
+
 export const AdminPage = () => {
   const { isAdmin, isAuthenticated } = useAuth();
   const navigate = useNavigate();
@@ -28,32 +31,60 @@ export const AdminPage = () => {
     return () => clearInterval(interval);
   }, [isAuthenticated, isAdmin, navigate]);
 
-  // Auto-refresh cada 30 segundos
+  // Actualizaciones en vivo: aplicar los cambios recibidos por el stream
   useEffect(() => {
-    const interval = setInterval(() => {
-      queryClient.invalidateQueries({ queryKey: ['turnos'] });
-      queryClient.invalidateQueries({ queryKey: ['estadisticas'] });
-    }, 30000);
-
-    return () => clearInterval(interval);
+    const aplicarCambio = (estado: 'esperando' | 'en_atencion', turno: Turno) => {
+      queryClient.setQueryData<Turno[]>(['turnos', estado], (turnos) => {
+        if (!turnos) return turnos;
+        const resto = turnos.filter((t) => t.id !== turno.id);
+        return turno.estado === estado ? [...resto, turno] : resto;
+      });
+    };
+
+    // Las estadísticas se recalculan en el servidor: a lo sumo una recarga cada
+    // ESTADISTICAS_INTERVALO_MS aunque lleguen muchos eventos seguidos
+    let recargaPendiente: ReturnType<typeof setTimeout> | null = null;
+    const recargarEstadisticas = () => {
+      if (recargaPendiente) return;
+      recargaPendiente = setTimeout(() => {
+        recargaPendiente = null;
+        queryClient.invalidateQueries({ queryKey: ['estadisticas'] });
+      }, ESTADISTICAS_INTERVALO_MS);
+    };
+
+    const desuscribir = eventosAPI.suscribir(
+      (_tipo, turno) => {
+        aplicarCambio('esperando', turno);
+        aplicarCambio('en_atencion', turno);
+        recargarEstadisticas();
+      },
+      () => {
+        queryClient.invalidateQueries({ queryKey: ['turnos'] });
+        recargarEstadisticas();
+      }
+    );
+    return () => {
+      desuscribir();
+      if (recargaPendiente) clearTimeout(recargaPendiente);
+    };
   }, [queryClient]);
 
   const { data: turnosEsperando = [], isLoading: loadingEsperando } = useQuery({
     queryKey: ['turnos', 'esperando'],
     queryFn: () => turnosAPI.getAll({ estado: 'esperando' }).then((res) => res.data),
-    refetchInterval: 30000,
+    refetchInterval: 300000,
   });
 
   const { data: turnosEnAtencion = [], isLoading: loadingEnAtencion } = useQuery({
     queryKey: ['turnos', 'en_atencion'],
     queryFn: () => turnosAPI.getAll({ estado: 'en_atencion' }).then((res) => res.data),
-    refetchInterval: 30000,
+    refetchInterval: 300000,
   });
 
   const { data: estadisticas, isLoading: loadingEstadisticas } = useQuery({
     queryKey: ['estadisticas'],
     queryFn: () => estadisticasAPI.get().then((res) => res.data),
-    refetchInterval: 30000,
+    refetchInterval: 300000,
   });
 
   const iniciarMutation = useMutation({
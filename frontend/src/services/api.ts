@@ -45,6 +45,12 @@ export interface Categoria {
   nombre: string;
   descripcion: string;
   tiempo_estimado: number;
+  sucursal_id: number;
+}
+
+export interface Sucursal {
+  id: number;
+  nombre: string;
 }
 
 export interface Turno {
@@ -57,6 +63,7 @@ export interface Turno {
   hora_estimada: string | null;
   hora_inicio: string | null;
   hora_fin: string | null;
+  sucursal_id: number;
 }
 
 export interface User {
@@ -66,23 +73,69 @@ export interface User {
   es_admin: boolean;
 }
 
-export interface Estadisticas {
+export interface ResumenEstadisticas {
   total: number;
   esperando: number;
   en_atencion: number;
   completados: number;
   cancelados: number;
+  espera_promedio_minutos: number | null;
+  atencion_promedio_minutos: number | null;
+}
+
+export interface Estadisticas extends ResumenEstadisticas {
+  por_categoria: (ResumenEstadisticas & { categoria_id: number; categoria: string })[];
+}
+
+export interface ResumenReporte {
+  total: number;
+  completados: number;
+  cancelados: number;
+  espera_promedio_minutos: number | null;
+  atencion_promedio_minutos: number | null;
+}
+
+export interface Reporte extends ResumenReporte {
+  desde: string;
+  hasta: string;
+  por_categoria: (ResumenReporte & { categoria_id: number; categoria: string | null })[];
+  por_hora: (ResumenReporte & { hora: number })[];
+  por_periodo: (ResumenReporte & { periodo: string })[];
 }
 
+export interface PantallaCategoria {
+  categoria_id: number;
+  categoria: string;
+  atendiendo: number[];
+  proximos: number[];
+  esperando: number;
+}
+
+// API de Sucursales
+export const sucursalesAPI = {
+  getAll: () => apiClient.get<Sucursal[]>('/sucursales'),
+};
+
 // API de Categorías
 export const categoriasAPI = {
-  getAll: () => apiClient.get<Categoria[]>('/categorias'),
+  getAll: (sucursalId?: number) =>
+    apiClient.get<Categoria[]>('/categorias', { params: { sucursal_id: sucursalId } }),
   getById: (id: number) => apiClient.get<Categoria>(`/categorias/${id}`),
 };
 
 // API de Turnos
 export const turnosAPI = {
-  getAll: (params?: { estado?: string; categoria_id?: number }) => 
+  // Paginado por cursor: la página siguiente viene en el header X-Siguiente-Cursor
+  getAll: (params?: {
+    estado?: string;
+    categoria_id?: number;
+    sucursal_id?: number;
+    desde?: string;
+    hasta?: string;
+    limite?: number;
+    cursor?: string;
+    campos?: string;
+  }) => 
     apiClient.get<Turno[]>('/turnos', { params }),
   create: (categoriaId: number) => 
     apiClient.post<Turno>('/turnos', { categoria_id: categoriaId }),
@@ -94,6 +147,28 @@ export const turnosAPI = {
     apiClient.post(`/completar_turno/${turnoId}`),
   cancelar: (turnoId: number) => 
     apiClient.post(`/cancelar_turno/${turnoId}`),
+  llamarSiguiente: (params: {
+    categoria_id?: number;
+    categorias?: number[];
+    pesos?: Record<number, number>;
+    sucursal_id?: number;
+    completar_turno_id?: number;
+  }) =>
+    apiClient.post<{ success: boolean; mensaje: string; turno: Turno | null; completado: Turno | null }>(
+      '/llamar_siguiente', params
+    ),
+  // Operaciones masivas: un único UPDATE en el servidor
+  lote: (params: {
+    accion: 'cancelar' | 'completar' | 'reasignar';
+    ids?: number[];
+    filtro?: { categoria_id?: number; sucursal_id?: number; estado?: string; antiguedad_minutos?: number; antes_de?: string };
+    categoria_destino?: number;
+  }) =>
+    apiClient.post<{ success: boolean; accion: string; afectados: number; ids: number[]; turnos?: Turno[] }>(
+      '/turnos/lote', params
+    ),
+  importar: (turnos: { categoria_id: number; hora: string }[]) =>
+    apiClient.post<{ success: boolean; creados: number; turnos: Turno[] }>('/turnos/importar', { turnos }),
 };
 
 // API de Autenticación
@@ -105,15 +180,55 @@ export const authAPI = {
   me: () =>
     apiClient.get<User>('/auth/me'),
   logout: () => {
+    // Revocar el token en el servidor; la sesión local se cierra igual si falla
+    const revocar = localStorage.getItem('token')
+      ? apiClient.post('/auth/logout').catch(() => undefined)
+      : Promise.resolve();
     localStorage.removeItem('token');
     localStorage.removeItem('user');
-    return Promise.resolve();
+    return revocar.then(() => undefined);
   },
 };
 
+// API de Pantallas de sala
+export const pantallaAPI = {
+  get: (sucursalId?: number) =>
+    apiClient.get<PantallaCategoria[]>('/pantalla', { params: { sucursal_id: sucursalId } }),
+};
+
 // API de Estadísticas
 export const estadisticasAPI = {
-  get: () => apiClient.get<Estadisticas>('/estadisticas'),
+  get: (sucursalId?: number) =>
+    apiClient.get<Estadisticas>('/estadisticas', { params: { sucursal_id: sucursalId } }),
+  // Días cerrados (YYYY-MM-DD), desde los resúmenes diarios
+  getReporte: (params?: { desde?: string; hasta?: string; agrupar?: 'dia' | 'semana' | 'mes'; sucursal_id?: number }) =>
+    apiClient.get<Reporte>('/reportes', { params }),
+};
+
+// Stream de eventos de turnos (Server-Sent Events)
+export type TurnoEvento =
+  | 'turno_creado'
+  | 'turno_iniciado'
+  | 'turno_completado'
+  | 'turno_cancelado'
+  | 'turno_reasignado';
+
+export const eventosAPI = {
+  // EventSource reconecta solo y reenvía Last-Event-ID para no perder cambios
+  suscribir: (onTurno: (tipo: TurnoEvento, turno: Turno) => void, onReset: () => void, sucursalId?: number) => {
+    const filtro = sucursalId ? `?sucursal_id=${sucursalId}` : '';
+    const source = new EventSource(`${API_URL}/api/turnos/eventos${filtro}`);
+    const tipos: TurnoEvento[] = [
+      'turno_creado', 'turno_iniciado', 'turno_completado', 'turno_cancelado', 'turno_reasignado',
+    ];
+    tipos.forEach((tipo) => {
+      source.addEventListener(tipo, (event) => {
+        onTurno(tipo, JSON.parse((event as MessageEvent).data));
+      });
+    });
+    source.addEventListener('reset', onReset);
+    return () => source.close();
+  },
 };
 
 export default apiClient;
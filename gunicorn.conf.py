@@ -0,0 +1,81 @@
+# =============================================================================
+# SISTEMA DE TURNOS - CONFIGURACION DE GUNICORN (PRODUCCION)
+# =============================================================================
+"""
+Configuración del servidor de producción. Gunicorn la carga automáticamente
+desde el directorio de trabajo:
+
+    TURNERO_ENV=production gunicorn app:app
+
+Todos los valores se pueden ajustar con variables de entorno.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import multiprocessing
+import os
+
+# El entorno de producción de config.py se selecciona salvo que se indique otro
+os.environ.setdefault('TURNERO_ENV', 'production')
+
+# =============================================================================
+# RED
+# =============================================================================
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+backlog = int(os.environ.get('GUNICORN_BACKLOG', 2048))
+
+# =============================================================================
+# WORKERS
+# =============================================================================
+# gthread: cada worker atiende varios requests con hilos. Cada stream SSE abierto
+# (/api/turnos/eventos, uno por panel de administración o pantalla) ocupa un hilo
+# mientras dure, así que los hilos se dimensionan como los de la API más los streams.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Las colas, el bus de eventos y los caches viven en memoria de cada proceso:
+# por defecto un solo worker con muchos hilos mantiene una vista única.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Streams SSE simultáneos previstos por worker; con más streams que esto, la API
+# se queda sin hilos libres. Los hilos de un stream esperan sin consumir CPU.
+streams_sse = int(os.environ.get('GUNICORN_STREAMS_SSE', 32))
+threads = int(os.environ.get('GUNICORN_THREADS', min(32, multiprocessing.cpu_count() * 4) + streams_sse))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))  # gevent
+
+# Cargar la aplicación en el master antes del fork: arranque más rápido y
+# memoria compartida entre workers (copy-on-write)
+preload_app = True
+
+# =============================================================================
+# TIEMPOS Y RECICLADO
+# =============================================================================
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# Al recibir SIGHUP/SIGTERM los workers terminan los requests en curso
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Reciclado opcional de workers para acotar fugas de memoria (0 = nunca)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# =============================================================================
+# LOGS
+# =============================================================================
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+# =============================================================================
+# HOOKS
+# =============================================================================
+def when_ready(server):
+    """Prepara la base una sola vez en el master, antes de que los workers la usen"""
+    from app import app, inicializar_base
+    if app.config['AUTO_INICIALIZAR_DB']:
+        with app.app_context():
+            inicializar_base()
+
+def post_fork(server, worker):
+    """Cada worker abre sus propias conexiones: las heredadas del master no se comparten"""
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,113 @@
+# =============================================================================
+# SISTEMA DE TURNOS - LIMITES DE TASA
+# =============================================================================
+"""
+Limitación de tasa por cubeta de fichas (token bucket): cada clave (IP, kiosco,
+email) tiene una cubeta de `capacidad` fichas que se recarga a razón de
+`por_minuto` fichas por minuto; cada request consume una y, si no quedan, se
+rechaza indicando cuántos segundos esperar.
+
+El estado vive en un backend intercambiable: CubetaMemoria (por proceso) o
+CubetaRedis (compartido entre procesos y servidores). Cualquier objeto con el
+método consumir(clave, capacidad, por_segundo) sirve como backend.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import math
+import threading
+import time
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+class CubetaMemoria:
+    """Cubetas en un diccionario del proceso"""
+
+    def __init__(self, max_claves=100000):
+        self.max_claves = max_claves
+        self._cubetas = {}  # clave -> [fichas, instante de la última actualización]
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, capacidad, por_segundo):
+        """Devuelve (permitido, segundos hasta la próxima ficha)"""
+        ahora = time.monotonic()
+        with self._lock:
+            cubeta = self._cubetas.get(clave)
+            if cubeta is None:
+                if len(self._cubetas) >= self.max_claves:
+                    self._purgar(ahora, por_segundo, capacidad)
+                cubeta = self._cubetas[clave] = [capacidad, ahora]
+            else:
+                cubeta[0] = min(capacidad, cubeta[0] + (ahora - cubeta[1]) * por_segundo)
+                cubeta[1] = ahora
+            if cubeta[0] >= 1:
+                cubeta[0] -= 1
+                return True, 0
+            return False, (1 - cubeta[0]) / por_segundo
+
+    def _purgar(self, ahora, por_segundo, capacidad):
+        # Una cubeta que ya se habría llenado equivale a una clave nueva
+        llena = capacidad / por_segundo
+        for clave in [c for c, (_, instante) in self._cubetas.items() if ahora - instante >= llena]:
+            del self._cubetas[clave]
+
+
+class CubetaRedis:
+    """Cubetas en Redis, actualizadas atómicamente con un script Lua"""
+
+    SCRIPT = """
+    local capacidad = tonumber(ARGV[1])
+    local por_segundo = tonumber(ARGV[2])
+    local reloj = redis.call('TIME')
+    local ahora = tonumber(reloj[1]) + tonumber(reloj[2]) / 1000000
+    local cubeta = redis.call('HMGET', KEYS[1], 'fichas', 'instante')
+    local fichas = tonumber(cubeta[1]) or capacidad
+    local instante = tonumber(cubeta[2]) or ahora
+    fichas = math.min(capacidad, fichas + (ahora - instante) * por_segundo)
+    local espera = 0
+    if fichas >= 1 then
+        fichas = fichas - 1
+    else
+        espera = (1 - fichas) / por_segundo
+    end
+    redis.call('HSET', KEYS[1], 'fichas', tostring(fichas), 'instante', tostring(ahora))
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return tostring(espera)
+    """
+
+    def __init__(self, cliente, prefijo='turnero:limite:'):
+        self.prefijo = prefijo
+        self._script = cliente.register_script(self.SCRIPT)
+
+    def consumir(self, clave, capacidad, por_segundo):
+        vencimiento = math.ceil(capacidad / por_segundo) + 1
+        espera = float(self._script(keys=[self.prefijo + clave], args=[capacidad, por_segundo, vencimiento]))
+        return espera == 0, espera
+
+
+def crear_backend(url):
+    """Backend según la configuración: 'memoria' o una URL redis://"""
+    if url == 'memoria':
+        return CubetaMemoria()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('RATE_LIMIT_BACKEND con Redis requiere: pip install redis') from e
+        return CubetaRedis(redis.Redis.from_url(url))
+    raise ValueError(f'RATE_LIMIT_BACKEND desconocido: {url}')
+
+# =============================================================================
+# LIMITADOR
+# =============================================================================
+class LimitadorTasa:
+    """Aplica límites (capacidad, por_minuto) sobre el backend configurado"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or CubetaMemoria()
+
+    def permitir(self, clave, capacidad, por_minuto):
+        """Devuelve (permitido, segundos para reintentar)"""
+        return self.backend.consumir(clave, capacidad, por_minuto / 60)
@@ -0,0 +1,146 @@
+# =============================================================================
+# SISTEMA DE TURNOS - METRICAS E INSTRUMENTACION
+# =============================================================================
+"""
+Métricas por endpoint: histograma de latencias, cantidad de requests por
+código de respuesta y cantidad/tiempo de sentencias SQL por request, más un
+log de consultas lentas. Se exponen en formato de texto de Prometheus.
+
+Si las métricas están deshabilitadas no se registra ningún hook, por lo que
+no agregan costo a los requests.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import request
+from sqlalchemy import event
+
+logger_sql = logging.getLogger('turnero.sql')
+
+# Límites superiores (segundos) de los buckets del histograma de latencias
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# =============================================================================
+# REGISTRO DE METRICAS
+# =============================================================================
+class _Endpoint:
+    """Acumuladores de un endpoint (método + regla de ruta)"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_LATENCIA) + 1)  # el último es +Inf
+        self.suma_segundos = 0.0
+        self.respuestas = defaultdict(int)  # código -> cantidad
+        self.sql_sentencias = 0
+        self.sql_segundos = 0.0
+
+
+class Metricas:
+    """Acumula métricas por endpoint y las exporta en formato Prometheus"""
+
+    def __init__(self, umbral_sql_lenta=0.2):
+        self.umbral_sql_lenta = umbral_sql_lenta
+        self._endpoints = defaultdict(_Endpoint)
+        self._lock = threading.Lock()
+        self._request = threading.local()
+
+    # =========================================================================
+    # INSTALACION
+    # =========================================================================
+    def instalar(self, app, engine):
+        """Registra los hooks de Flask y SQLAlchemy"""
+        app.before_request(self._inicio_request)
+        app.after_request(self._fin_request)
+        event.listen(engine, 'before_cursor_execute', self._inicio_sql)
+        event.listen(engine, 'after_cursor_execute', self._fin_sql)
+
+    def _inicio_request(self):
+        estado = self._request
+        estado.inicio = time.perf_counter()
+        estado.sql_sentencias = 0
+        estado.sql_segundos = 0.0
+
+    def _fin_request(self, respuesta):
+        estado = self._request
+        inicio = getattr(estado, 'inicio', None)
+        if inicio is None:
+            return respuesta
+        duracion = time.perf_counter() - inicio
+        estado.inicio = None
+
+        regla = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        with self._lock:
+            endpoint = self._endpoints[(request.method, regla)]
+            endpoint.buckets[bisect_left(BUCKETS_LATENCIA, duracion)] += 1
+            endpoint.suma_segundos += duracion
+            endpoint.respuestas[respuesta.status_code] += 1
+            endpoint.sql_sentencias += estado.sql_sentencias
+            endpoint.sql_segundos += estado.sql_segundos
+        return respuesta
+
+    def _inicio_sql(self, conn, cursor, sentencia, parametros, contexto, executemany):
+        contexto._metricas_inicio = time.perf_counter()
+
+    def _fin_sql(self, conn, cursor, sentencia, parametros, contexto, executemany):
+        duracion = time.perf_counter() - contexto._metricas_inicio
+        estado = self._request
+        if getattr(estado, 'inicio', None) is not None:
+            estado.sql_sentencias += 1
+            estado.sql_segundos += duracion
+        if duracion >= self.umbral_sql_lenta:
+            logger_sql.warning('Consulta lenta (%.1f ms): %s', duracion * 1000, ' '.join(sentencia.split()))
+
+    # =========================================================================
+    # EXPORTACION
+    # =========================================================================
+    def exportar(self):
+        """Texto en formato de exposición de Prometheus"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lineas = [
+                '# HELP turnero_request_segundos Latencia de los requests por endpoint',
+                '# TYPE turnero_request_segundos histogram',
+            ]
+            for (metodo, regla), datos in endpoints:
+                etiquetas = f'metodo="{metodo}",endpoint="{regla}"'
+                acumulado = 0
+                for limite, cantidad in zip(BUCKETS_LATENCIA + ('+Inf',), datos.buckets):
+                    acumulado += cantidad
+                    lineas.append(f'turnero_request_segundos_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+                lineas.append(f'turnero_request_segundos_sum{{{etiquetas}}} {datos.suma_segundos:.6f}')
+                lineas.append(f'turnero_request_segundos_count{{{etiquetas}}} {acumulado}')
+
+            lineas += [
+                '# HELP turnero_requests_total Requests por endpoint y código de respuesta',
+                '# TYPE turnero_requests_total counter',
+            ]
+            for (metodo, regla), datos in endpoints:
+                for codigo, cantidad in sorted(datos.respuestas.items()):
+                    lineas.append(
+                        f'turnero_requests_total{{metodo="{metodo}",endpoint="{regla}",codigo="{codigo}"}} {cantidad}'
+                    )
+
+            lineas += [
+                '# HELP turnero_sql_sentencias_total Sentencias SQL ejecutadas por endpoint',
+                '# TYPE turnero_sql_sentencias_total counter',
+            ]
+            for (metodo, regla), datos in endpoints:
+                lineas.append(
+                    f'turnero_sql_sentencias_total{{metodo="{metodo}",endpoint="{regla}"}} {datos.sql_sentencias}'
+                )
+
+            lineas += [
+                '# HELP turnero_sql_segundos_total Tiempo en SQL por endpoint',
+                '# TYPE turnero_sql_segundos_total counter',
+            ]
+            for (metodo, regla), datos in endpoints:
+                lineas.append(
+                    f'turnero_sql_segundos_total{{metodo="{metodo}",endpoint="{regla}"}} {datos.sql_segundos:.6f}'
+                )
+        return '\n'.join(lineas) + '\n'
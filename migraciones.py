@@ -0,0 +1,94 @@
+# =============================================================================
+# SISTEMA DE TURNOS - MIGRACIONES DE ESQUEMA
+# =============================================================================
+"""
+Migraciones versionadas del esquema de base de datos.
+db.create_all() crea las tablas nuevas pero no modifica las existentes; cada
+migración de esta lista lleva una base ya desplegada hasta el esquema actual.
+La versión aplicada se guarda en la tabla schema_version.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+from datetime import datetime
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+# =============================================================================
+# MIGRACIONES
+# =============================================================================
+def agregar_columna(tabla, columna, definicion):
+    """Paso de migración que agrega una columna si la tabla existe y todavía no la tiene"""
+    def paso(conexion):
+        inspector = inspect(conexion)
+        if not inspector.has_table(tabla):
+            return
+        if columna not in {c['name'] for c in inspector.get_columns(tabla)}:
+            conexion.execute(text(f'ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}'))
+    return paso
+
+# (version, descripcion, sentencias). Cada sentencia es SQL o una función que
+# recibe la conexión; deben ser idempotentes, porque en una base nueva
+# create_all() ya creó los objetos del modelo.
+MIGRACIONES = [
+    (1, 'Indices de las consultas frecuentes de turnos', [
+        'CREATE INDEX IF NOT EXISTS ix_turno_categoria_estado ON turno (categoria_id, estado)',
+        'CREATE INDEX IF NOT EXISTS ix_turno_categoria_numero ON turno (categoria_id, numero)',
+        'CREATE INDEX IF NOT EXISTS ix_turno_estado_fecha ON turno (estado, fecha_creacion)',
+        'CREATE INDEX IF NOT EXISTS ix_turno_fecha_creacion ON turno (fecha_creacion)',
+    ]),
+    (2, 'Sucursales: sucursal_id en categorías y turnos', [
+        # Las bases existentes pasan a ser la sucursal 1 (valor por defecto de las columnas)
+        "INSERT INTO sucursal (nombre, activa) SELECT 'Casa Central', TRUE "
+        'WHERE NOT EXISTS (SELECT 1 FROM sucursal)',
+        agregar_columna('categoria', 'sucursal_id', 'INTEGER NOT NULL DEFAULT 1'),
+        agregar_columna('turno', 'sucursal_id', 'INTEGER NOT NULL DEFAULT 1'),
+        agregar_columna('turno_historico', 'sucursal_id', 'INTEGER NOT NULL DEFAULT 1'),
+        'CREATE INDEX IF NOT EXISTS ix_categoria_sucursal ON categoria (sucursal_id)',
+        'CREATE INDEX IF NOT EXISTS ix_turno_sucursal_estado_fecha ON turno (sucursal_id, estado, fecha_creacion)',
+        'CREATE INDEX IF NOT EXISTS ix_turno_sucursal_fecha ON turno (sucursal_id, fecha_creacion)',
+        'CREATE INDEX IF NOT EXISTS ix_turno_historico_sucursal_fecha ON turno_historico (sucursal_id, fecha_creacion)',
+    ]),
+]
+
+# =============================================================================
+# APLICACION
+# =============================================================================
+def version_actual(conexion):
+    """Última versión de esquema aplicada (0 si nunca se migró)"""
+    return conexion.execute(text('SELECT MAX(version) FROM schema_version')).scalar() or 0
+
+def aplicar_migraciones(engine):
+    """Aplica en orden las migraciones pendientes. Devuelve la versión final"""
+    with engine.begin() as conexion:
+        conexion.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_version ('
+            'version INTEGER PRIMARY KEY, '
+            'descripcion VARCHAR(200), '
+            'fecha_aplicada TIMESTAMP)'
+        ))
+        actual = version_actual(conexion)
+
+    for version, descripcion, sentencias in MIGRACIONES:
+        if version <= actual:
+            continue
+        # Cada migración en su propia transacción: si falla, no queda a medias
+        try:
+            with engine.begin() as conexion:
+                for sentencia in sentencias:
+                    if callable(sentencia):
+                        sentencia(conexion)
+                    else:
+                        conexion.execute(text(sentencia))
+                conexion.execute(
+                    text('INSERT INTO schema_version (version, descripcion, fecha_aplicada) '
+                         'VALUES (:version, :descripcion, :fecha)'),
+                    {'version': version, 'descripcion': descripcion, 'fecha': datetime.utcnow()}
+                )
+        except IntegrityError:
+            # Otro proceso aplicó la misma versión al mismo tiempo
+            pass
+        actual = version
+
+    return actual
@@ -0,0 +1,87 @@
+# =============================================================================
+# SISTEMA DE TURNOS - PANTALLAS DE SALA
+# =============================================================================
+"""
+Estado resumido para las pantallas de la sala de espera: por categoría, los
+números en atención y los próximos en espera.
+
+Cada cambio de estado de un turno recalcula solo las categorías afectadas a
+partir del motor de colas y vuelve a codificar el JSON de su sucursal; las
+pantallas reciben esos bytes ya armados, sin consultar la base ni codificar
+nada en cada consulta.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import hashlib
+import json
+import threading
+
+# =============================================================================
+# PANTALLA DE SALA
+# =============================================================================
+class PantallaSala:
+    """JSON precalculado por sucursal con lo que muestran las pantallas"""
+
+    def __init__(self, motor, catalogo, proximos=5):
+        self._motor = motor
+        self._catalogo = catalogo
+        self.proximos = proximos  # números en espera que se muestran por categoría
+        self._lock = threading.Lock()
+        self._categorias = {}  # categoria_id -> dict de la categoría en la pantalla
+        self._sucursales = {}  # sucursal_id -> (categorías del catálogo usadas, JSON, ETag)
+
+    def obtener(self, sucursal_id):
+        """(JSON codificado, ETag) de la pantalla de la sucursal"""
+        activas = self._catalogo.activas_sucursal(sucursal_id)
+        guardada = self._sucursales.get(sucursal_id)
+        # El catálogo devuelve una tupla nueva al recargarse: nombres o categorías cambiaron
+        if guardada is None or guardada[0] is not activas:
+            with self._lock:
+                guardada = self._codificar(sucursal_id, recalcular=True)
+        return guardada[1], guardada[2]
+
+    def actualizar(self, categorias):
+        """Recalcula las categorías indicadas y la pantalla de sus sucursales"""
+        with self._lock:
+            sucursales = set()
+            for categoria_id in categorias:
+                categoria = self._catalogo.obtener(categoria_id)
+                if categoria is None:
+                    continue
+                self._categorias[categoria_id] = self._resumir(categoria)
+                sucursales.add(categoria['sucursal_id'])
+            for sucursal_id in sucursales:
+                if sucursal_id in self._sucursales:
+                    self._codificar(sucursal_id)
+
+    def invalidar(self):
+        """Descarta todo (por ejemplo, después de reconstruir el motor de colas)"""
+        with self._lock:
+            self._categorias.clear()
+            self._sucursales.clear()
+
+    # =========================================================================
+    # ARMADO
+    # =========================================================================
+    def _resumir(self, categoria):
+        return {
+            'categoria_id': categoria['id'],
+            'categoria': categoria['nombre'],
+            'atendiendo': [numero for _, numero in self._motor.en_atencion(categoria['id'])],
+            'proximos': [numero for _, numero in self._motor.esperando(categoria['id'], self.proximos)],
+            'esperando': self._motor.cantidad_esperando(categoria['id'])
+        }
+
+    def _codificar(self, sucursal_id, recalcular=False):
+        activas = self._catalogo.activas_sucursal(sucursal_id)
+        pantalla = []
+        for categoria_id in activas:
+            resumen = None if recalcular else self._categorias.get(categoria_id)
+            if resumen is None:
+                resumen = self._categorias[categoria_id] = self._resumir(self._catalogo.obtener(categoria_id))
+            pantalla.append(resumen)
+        contenido = json.dumps(pantalla, separators=(',', ':')).encode()
+        guardada = self._sucursales[sucursal_id] = (activas, contenido, hashlib.md5(contenido).hexdigest())
+        return guardada
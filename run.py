@@ -5,14 +5,17 @@
 """
 Script de inicio para el Sistema de Turnos
 Proporciona una interfaz de línea de comandos para ejecutar la aplicación
+
+    python run.py               # servidor de desarrollo (Werkzeug, recarga automática)
+    python run.py --produccion  # gunicorn con gunicorn.conf.py y ProductionConfig
 """
 
 # =============================================================================
 # IMPORTS
 # =============================================================================
+import argparse
 import os
 import sys
-from app import app, db
 
 # =============================================================================
 # FUNCION PRINCIPAL
@@ -20,6 +23,17 @@ from app import app, db
 def main():
     """Función principal para ejecutar la aplicación"""
     
+    parser = argparse.ArgumentParser(description='Sistema de Turnos')
+    parser.add_argument('--produccion', action='store_true',
+                        help='ejecutar con gunicorn en lugar del servidor de desarrollo')
+    args = parser.parse_args()
+    
+    if args.produccion:
+        iniciar_produccion()
+        return
+    
+    from app import app, crear_admin_por_defecto, inicializar_base
+    
     # =============================================================================
     # CABECERA Y PRESENTACION
     # =============================================================================
@@ -30,12 +44,12 @@ def main():
     # =============================================================================
     # VERIFICACION DE BASE DE DATOS
     # =============================================================================
-    # Verificar si existe la base de datos
-    if not os.path.exists('turnero.db'):
-        print("📊 Creando base de datos...")
-        with app.app_context():
-            db.create_all()
-            print("✅ Base de datos creada exitosamente")
+    # Crear tablas, migraciones, categorías y administrador si faltan
+    with app.app_context():
+        inicializar_base()
+        if crear_admin_por_defecto():
+            print("👤 Usuario administrador creado")
+    print("✅ Base de datos lista")
     
     # =============================================================================
     # INFORMACION DEL SISTEMA
@@ -69,8 +83,8 @@ def main():
         app.run(
             host='0.0.0.0',
             port=5000,
-            debug=True,
-            use_reloader=True
+            debug=app.config['DEBUG'],
+            use_reloader=app.config['DEBUG']
         )
     except KeyboardInterrupt:
         # =============================================================================
@@ -86,6 +100,21 @@ def main():
         print(f"\n❌ Error al iniciar el servidor: {e}")
         sys.exit(1)
 
+# =============================================================================
+# MODO PRODUCCION
+# =============================================================================
+def iniciar_produccion():
+    """Reemplaza el proceso actual por gunicorn con la configuración de producción"""
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    os.environ.setdefault('TURNERO_ENV', 'production')
+    os.chdir(directorio)
+    print("🚀 Iniciando gunicorn (configuración: gunicorn.conf.py)")
+    try:
+        os.execvp('gunicorn', ['gunicorn', '--config', 'gunicorn.conf.py', 'app:app'])
+    except OSError as e:
+        print(f"❌ No se pudo ejecutar gunicorn: {e}")
+        sys.exit(1)
+
 # =============================================================================
 # PUNTO DE ENTRADA
 # =============================================================================
@@ -0,0 +1,53 @@
+# =============================================================================
+# SISTEMA DE TURNOS - FIXTURES DE PRUEBAS
+# =============================================================================
+"""
+Las pruebas usan la aplicación real sobre una base SQLite temporal en archivo
+(una base en memoria no se comparte entre los hilos de las pruebas de
+concurrencia). La configuración se lee al importar config.py, por eso las
+variables de entorno se fijan antes de importar la aplicación.
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+_directorio = tempfile.mkdtemp(prefix='turnero-tests-')
+atexit.register(shutil.rmtree, _directorio, ignore_errors=True)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_directorio, 'turnero.db')}"
+os.environ['RATE_LIMIT_HABILITADO'] = '0'
+os.environ['MAX_TURNOS_POR_CATEGORIA'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as turnero
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+@pytest.fixture
+def aplicacion():
+    """Aplicación con categorías y administrador, sin turnos y con el estado en memoria vacío"""
+    with turnero.app.app_context():
+        turnero.inicializar_base()
+        turnero.crear_admin_por_defecto()
+        turnero.db.session.execute(turnero.db.delete(turnero.Turno))
+        turnero.db.session.execute(turnero.db.delete(turnero.SecuenciaTurno))
+        turnero.db.session.commit()
+        turnero._bloques_numeros.clear()
+        turnero.cargar_estado()
+    yield turnero.app
+
+@pytest.fixture
+def auth_admin(aplicacion):
+    """Header Authorization de admin@turnero.com"""
+    respuesta = aplicacion.test_client().post(
+        '/api/auth/login', json={'email': 'admin@turnero.com', 'password': 'admin123'}
+    )
+    return {'Authorization': f"Bearer {respuesta.get_json()['access_token']}"}
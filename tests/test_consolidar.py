@@ -0,0 +1,43 @@
+# =============================================================================
+# SISTEMA DE TURNOS - PRUEBAS DE RESUMENES DIARIOS
+# =============================================================================
+from datetime import datetime, timedelta
+
+from app import db, comando_consolidar, ResumenDiario, Turno
+
+def agregar_turno(dias_atras, estado='completado'):
+    creado = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0) - timedelta(days=dias_atras)
+    db.session.add(Turno(numero=1, categoria_id=1, sucursal_id=1, estado=estado,
+                         fecha_creacion=creado, hora_estimada=creado))
+    db.session.commit()
+
+def consolidar(aplicacion, *args):
+    return aplicacion.test_cli_runner().invoke(comando_consolidar, list(args))
+
+def totales(dia):
+    return db.session.scalar(db.select(db.func.sum(ResumenDiario.total)).where(ResumenDiario.fecha == dia))
+
+def test_consolidar_recalcula_dias_que_cambiaron(aplicacion):
+    ayer = datetime.now().date() - timedelta(days=1)
+    with aplicacion.app_context():
+        db.session.execute(db.delete(ResumenDiario))
+        for dias_atras in (3, 1):
+            agregar_turno(dias_atras)
+
+        # Un --fecha reciente no deja sin consolidar los días anteriores
+        assert consolidar(aplicacion, '--fecha', ayer.isoformat()).exit_code == 0
+        assert 'Días consolidados: 1' in consolidar(aplicacion).output
+        assert 'Días consolidados: 0' in consolidar(aplicacion).output
+
+        # Un turno agregado o cerrado después de consolidar vuelve a consolidar el día
+        agregar_turno(1, estado='esperando')
+        assert 'Días consolidados: 1' in consolidar(aplicacion).output
+        assert totales(ayer) == 2
+        db.session.execute(db.update(Turno).where(Turno.estado == 'esperando').values(estado='cancelado'))
+        db.session.commit()
+        assert 'Días consolidados: 1' in consolidar(aplicacion).output
+
+def test_consolidar_rechaza_dias_abiertos(aplicacion):
+    resultado = consolidar(aplicacion, '--fecha', datetime.now().date().isoformat())
+    assert resultado.exit_code != 0
+    assert 'días cerrados' in resultado.output
@@ -0,0 +1,15 @@
+# =============================================================================
+# SISTEMA DE TURNOS - PRUEBAS DE CREACION DE TURNOS
+# =============================================================================
+import pytest
+
+@pytest.mark.parametrize('categoria_id', [1, '1'])
+def test_categoria_entera_o_string_de_digitos(aplicacion, categoria_id):
+    respuesta = aplicacion.test_client().post('/api/turnos', json={'categoria_id': categoria_id})
+    assert respuesta.status_code == 201
+    assert respuesta.get_json()['categoria_id'] == 1
+
+@pytest.mark.parametrize('categoria_id', [True, 1.7, '1.7', ' 1', '¹', [1], {'id': 1}])
+def test_categoria_invalida_se_rechaza(aplicacion, categoria_id):
+    respuesta = aplicacion.test_client().post('/api/turnos', json={'categoria_id': categoria_id})
+    assert respuesta.status_code == 400
@@ -0,0 +1,28 @@
+# =============================================================================
+# SISTEMA DE TURNOS - PRUEBAS DE LIMITES DE TASA
+# =============================================================================
+import pytest
+
+@pytest.fixture
+def con_limites(aplicacion, monkeypatch):
+    monkeypatch.setitem(aplicacion.config, 'RATE_LIMIT_HABILITADO', True)
+    monkeypatch.setitem(aplicacion.config, 'KIOSCO_CLAVES', frozenset({'kiosco-1'}))
+    return aplicacion
+
+def emitir(cliente, cantidad, ip, headers=None):
+    return [cliente.post('/api/turnos', json={'categoria_id': 1}, headers=headers,
+                         environ_base={'REMOTE_ADDR': ip}).status_code for _ in range(cantidad)]
+
+def test_clientes_sin_clave_se_limitan_por_ip(con_limites):
+    rafaga, _ = con_limites.config['LIMITE_TURNOS_IP']
+    assert rafaga > 0
+    estados = emitir(con_limites.test_client(), rafaga + 1, '203.0.113.10')
+    assert estados[:rafaga] == [201] * rafaga
+    assert estados[-1] == 429
+
+def test_kiosco_con_clave_no_usa_la_cubeta_de_su_ip(con_limites):
+    cliente = con_limites.test_client()
+    rafaga, _ = con_limites.config['LIMITE_TURNOS_IP']
+    assert emitir(cliente, rafaga + 1, '203.0.113.20')[-1] == 429
+    # Desde la misma IP, el kiosco con clave sigue emitiendo con su propia cubeta
+    assert emitir(cliente, 1, '203.0.113.20', headers={'X-Kiosco-Key': 'kiosco-1'}) == [201]
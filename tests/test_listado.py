@@ -0,0 +1,24 @@
+# =============================================================================
+# SISTEMA DE TURNOS - PRUEBAS DEL LISTADO DE TURNOS
+# =============================================================================
+from app import db, Categoria
+
+def test_etag_cambia_al_renombrar_la_categoria(aplicacion):
+    cliente = aplicacion.test_client()
+    cliente.post('/api/turnos', json={'categoria_id': 1})
+    etag = cliente.get('/api/turnos').headers['ETag']
+    assert cliente.get('/api/turnos', headers={'If-None-Match': etag}).status_code == 304
+
+    with aplicacion.app_context():
+        categoria = db.session.get(Categoria, 1)
+        nombre = categoria.nombre
+        categoria.nombre = 'Mesa de entradas'
+        db.session.commit()
+    try:
+        respuesta = cliente.get('/api/turnos', headers={'If-None-Match': etag})
+        assert respuesta.status_code == 200
+        assert respuesta.get_json()[0]['categoria'] == 'Mesa de entradas'
+    finally:
+        with aplicacion.app_context():
+            db.session.get(Categoria, 1).nombre = nombre
+            db.session.commit()
@@ -0,0 +1,60 @@
+# =============================================================================
+# SISTEMA DE TURNOS - PRUEBAS DE ASIGNACION CONCURRENTE
+# =============================================================================
+import threading
+
+import pytest
+
+from app import db, Turno
+
+PUESTOS = 8
+TURNOS = 60
+
+def test_cada_turno_se_asigna_una_sola_vez(aplicacion, auth_admin):
+    cliente = aplicacion.test_client()
+    creados = {cliente.post('/api/turnos', json={'categoria_id': 1 + i % 2}).get_json()['id'] for i in range(TURNOS)}
+
+    llamados, errores = [], []
+    lock = threading.Lock()
+    largada = threading.Barrier(PUESTOS)
+
+    def puesto():
+        cliente = aplicacion.test_client()
+        propios, fallidos = [], []
+        largada.wait()
+        # Cada puesto vacía la cola hasta que no queden turnos en espera
+        while True:
+            respuesta = cliente.post('/api/llamar_siguiente', headers=auth_admin, json={'categorias': [1, 2]})
+            if respuesta.status_code != 200:
+                fallidos.append(respuesta.status_code)
+                break
+            turno = respuesta.get_json()['turno']
+            if turno is None:
+                break
+            propios.append(turno['id'])
+        with lock:
+            llamados.extend(propios)
+            errores.extend(fallidos)
+
+    hilos = [threading.Thread(target=puesto) for _ in range(PUESTOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    assert sorted(llamados) == sorted(creados)
+    with aplicacion.app_context():
+        estados = db.session.scalars(db.select(Turno.estado).where(Turno.id.in_(creados))).all()
+        assert set(estados) == {'en_atencion'}
+
+@pytest.mark.parametrize('categorias', ['12', {'1': 1}, [1, '2'], [True]])
+def test_categorias_que_no_son_lista_de_enteros_se_rechazan(aplicacion, auth_admin, categorias):
+    cliente = aplicacion.test_client()
+    creado = cliente.post('/api/turnos', json={'categoria_id': 1}).get_json()['id']
+
+    respuesta = cliente.post('/api/llamar_siguiente', headers=auth_admin, json={'categorias': categorias})
+
+    assert respuesta.status_code == 400
+    with aplicacion.app_context():
+        assert db.session.get(Turno, creado).estado == 'esperando'
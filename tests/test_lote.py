@@ -0,0 +1,72 @@
+# =============================================================================
+# SISTEMA DE TURNOS - PRUEBAS DE OPERACIONES MASIVAS
+# =============================================================================
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from app import db, motor_colas, Turno
+
+def crear_turnos(cliente, cantidad, categoria_id=1):
+    return [cliente.post('/api/turnos', json={'categoria_id': categoria_id}).get_json()['id'] for _ in range(cantidad)]
+
+def estados(aplicacion, ids):
+    with aplicacion.app_context():
+        return dict(db.session.execute(db.select(Turno.id, Turno.estado).where(Turno.id.in_(ids))).all())
+
+@pytest.mark.parametrize('ids', ['12', {'1': True, '2': True}, [1, '2'], [1, True], 3])
+def test_ids_que_no_son_lista_de_enteros_se_rechazan(aplicacion, auth_admin, ids):
+    cliente = aplicacion.test_client()
+    creados = crear_turnos(cliente, 3)
+
+    respuesta = cliente.post('/api/turnos/lote', headers=auth_admin, json={'accion': 'cancelar', 'ids': ids})
+
+    assert respuesta.status_code == 400
+    assert set(estados(aplicacion, creados).values()) == {'esperando'}
+
+def test_cancelar_por_ids(aplicacion, auth_admin):
+    cliente = aplicacion.test_client()
+    creados = crear_turnos(cliente, 3)
+
+    respuesta = cliente.post('/api/turnos/lote', headers=auth_admin, json={'accion': 'cancelar', 'ids': creados[:2]})
+
+    assert respuesta.status_code == 200
+    assert sorted(respuesta.get_json()['ids']) == creados[:2]
+    assert estados(aplicacion, creados) == {creados[0]: 'cancelado', creados[1]: 'cancelado', creados[2]: 'esperando'}
+
+def test_reasignar_da_numeros_nuevos_de_la_categoria_destino(aplicacion, auth_admin):
+    cliente = aplicacion.test_client()
+    origen = crear_turnos(cliente, 2, categoria_id=1)
+    destino = crear_turnos(cliente, 3, categoria_id=2)
+
+    respuesta = cliente.post('/api/turnos/lote', headers=auth_admin,
+                             json={'accion': 'reasignar', 'ids': origen, 'categoria_destino': 2})
+
+    assert respuesta.status_code == 200
+    assert [t['numero'] for t in respuesta.get_json()['turnos']] == [4, 5]
+    with aplicacion.app_context():
+        numeros = db.session.scalars(db.select(Turno.numero).where(Turno.id.in_(origen + destino))).all()
+    assert sorted(numeros) == [1, 2, 3, 4, 5]
+    proximos = next(c for c in cliente.get('/api/pantalla').get_json() if c['categoria_id'] == 2)['proximos']
+    # Sin números repetidos y con su lugar por orden de llegada
+    assert proximos == [4, 5, 1, 2, 3]
+
+def test_reserva_importada_no_se_llama_antes_de_su_hora(aplicacion, auth_admin):
+    ahora = datetime.now()
+    hora = min(ahora + timedelta(hours=1), datetime.combine(ahora.date(), time(23, 59, 59)))
+    if hora - ahora < timedelta(seconds=10):
+        pytest.skip('demasiado cerca de la medianoche')
+    cliente = aplicacion.test_client()
+    respuesta = cliente.post('/api/turnos/importar', headers=auth_admin,
+                             json={'turnos': [{'categoria_id': 1, 'hora': hora.isoformat()}]})
+    reserva = respuesta.get_json()['turnos'][0]['id']
+    presente = crear_turnos(cliente, 1)[0]
+
+    assert [t['id'] for t in cliente.get('/api/colas/1').get_json()['esperando']] == [presente]
+    llamados = [cliente.post('/api/llamar_siguiente', headers=auth_admin, json={'categoria_id': 1}).get_json()['turno']
+                for _ in range(2)]
+    assert llamados[0]['id'] == presente and llamados[1] is None
+
+    # A su hora entra en la cola
+    assert motor_colas.liberar(hora) == {1}
+    assert motor_colas.siguiente(1)[0] == reserva
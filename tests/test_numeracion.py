@@ -0,0 +1,53 @@
+# =============================================================================
+# SISTEMA DE TURNOS - PRUEBAS DE NUMERACION CONCURRENTE
+# =============================================================================
+import threading
+
+import pytest
+
+from app import db, Turno
+
+HILOS = 16
+TURNOS_POR_HILO = 10
+CATEGORIAS = (1, 2)
+
+def emitir_en_paralelo(aplicacion):
+    """Cada hilo emite TURNOS_POR_HILO turnos alternando categorías; devuelve las respuestas"""
+    respuestas = []
+    lock = threading.Lock()
+    largada = threading.Barrier(HILOS)
+
+    def kiosco(indice):
+        cliente = aplicacion.test_client()
+        propias = []
+        largada.wait()
+        for i in range(TURNOS_POR_HILO):
+            categoria_id = CATEGORIAS[(indice + i) % len(CATEGORIAS)]
+            respuesta = cliente.post('/api/turnos', json={'categoria_id': categoria_id})
+            propias.append((respuesta.status_code, respuesta.get_json()))
+        with lock:
+            respuestas.extend(propias)
+
+    hilos = [threading.Thread(target=kiosco, args=(i,)) for i in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return respuestas
+
+@pytest.mark.parametrize('bloque', [1, 7])
+def test_numeros_consecutivos_y_unicos_bajo_concurrencia(aplicacion, monkeypatch, bloque):
+    monkeypatch.setitem(aplicacion.config, 'TURNOS_BLOQUE_NUMEROS', bloque)
+
+    respuestas = emitir_en_paralelo(aplicacion)
+
+    assert [estado for estado, _ in respuestas] == [201] * (HILOS * TURNOS_POR_HILO)
+    with aplicacion.app_context():
+        for categoria_id in CATEGORIAS:
+            devueltos = sorted(t['numero'] for _, t in respuestas if t['categoria_id'] == categoria_id)
+            guardados = db.session.scalars(
+                db.select(Turno.numero).where(Turno.categoria_id == categoria_id).order_by(Turno.numero)
+            ).all()
+            esperados = list(range(1, HILOS * TURNOS_POR_HILO // len(CATEGORIAS) + 1))
+            assert devueltos == esperados
+            assert guardados == esperados